@@ -8,12 +8,42 @@ import plotly.express as px
 import plotly.graph_objects as go
 import requests
 import json
+import hashlib
+import io
+import math
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import List, Dict, Optional, Tuple
-from sklearn.linear_model import LinearRegression
 import re
+from bisect import bisect_left, bisect_right
 from datetime import datetime, timedelta
 
+# Numba est optionnel : sans lui, on retombe sur les implémentations NumPy
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# requests_cache est optionnel : sans lui, la session HTTP n'a pas de cache disque
+try:
+    import requests_cache
+    REQUESTS_CACHE_AVAILABLE = True
+except ImportError:
+    REQUESTS_CACHE_AVAILABLE = False
+
+# pyarrow est optionnel : sans lui, les cours téléchargés ne sont pas conservés sur disque
+try:
+    import pyarrow  # noqa: F401 (moteur Parquet de pandas)
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
 # Configuration de la page
 st.set_page_config(
     page_title="Portfolio Analyzer Pro",
@@ -56,47 +86,197 @@ custom_css = """
 """
 st.markdown(custom_css, unsafe_allow_html=True)
 
+class DiskCache:
+    """Cache JSON persistant sur disque avec expiration, partagé entre sessions et redémarrages
+
+    Les écritures sont groupées : set() ne modifie que la mémoire, flush() réécrit le fichier
+    une seule fois (appelé en fin de lot, ex. après validate_tickers_many).
+    """
+    
+    def __init__(self, path: str, max_age_days: int = 90):
+        self.path = path
+        self.max_age = max_age_days * 86400
+        self._lock = threading.Lock()
+        self._data = None
+        self._dirty = False
+    
+    def _read_file(self) -> Dict:
+        """Contenu du fichier (vide s'il est absent ou corrompu)"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _load(self) -> Dict:
+        """Lecture paresseuse du fichier"""
+        if self._data is None:
+            self._data = self._read_file()
+        return self._data
+    
+    def get(self, key: str):
+        """Valeur associée à la clé, None si absente ou expirée"""
+        with self._lock:
+            entry = self._load().get(key)
+        if entry is None or time.time() - entry.get('ts', 0) > self.max_age:
+            return None
+        return entry.get('value')
+    
+    def set(self, key: str, value) -> None:
+        """Enregistre la valeur en mémoire ; écrite sur disque au prochain flush()"""
+        with self._lock:
+            self._load()[key] = {'value': value, 'ts': time.time()}
+            self._dirty = True
+    
+    def flush(self) -> None:
+        """Réécrit le fichier de façon atomique si des entrées ont été ajoutées depuis le dernier flush"""
+        with self._lock:
+            if not self._dirty:
+                return
+            # Fusion avec le fichier actuel : les entrées écrites par un autre processus sont conservées
+            merged = self._read_file()
+            merged.update(self._data)
+            self._data = merged
+            self._dirty = False
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(merged, f)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                pass  # Le cache disque est facultatif (ex. système de fichiers en lecture seule)
+
+# Nombre maximal d'appels réseau simultanés (taille du pool de connexions HTTP partagé)
+HTTP_MAX_WORKERS = 16
+
+def _thread_map(fn, items: List, max_workers: int = HTTP_MAX_WORKERS) -> List:
+    """executor.map dont chaque worker porte le contexte Streamlit du thread appelant
+
+    Sans ce contexte, st.cache_data et st.warning appelés depuis un worker journalisent
+    « missing ScriptRunContext » et les messages n'atteignent pas la page.
+    """
+    if not items:
+        return []
+    ctx = get_script_run_ctx()
+    
+    def run(item):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fn(item)
+    
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(run, items))
+
+@st.cache_resource
+def _ticker_metadata_cache() -> DiskCache:
+    """Cache disque des métadonnées de tickers (données quasi statiques, expiration 90 jours)"""
+    return DiskCache(os.path.join('.cache', 'ticker_metadata.json'), max_age_days=90)
+
+# Mot-clé de secteur -> type d'actif (recherche par sous-chaîne, dans l'ordre de déclaration)
+SECTOR_TO_ASSET_TYPE = {
+    'technology': 'Tech Stock',
+    'healthcare': 'Healthcare Stock',
+    'financial': 'Financial Stock',
+    'energy': 'Energy Stock',
+    'consumer': 'Consumer Stock',
+    'industrial': 'Industrial Stock',
+    'utilities': 'Utility Stock',
+    'materials': 'Materials Stock',
+    'telecommunication': 'Telecom Stock'
+}
+CRYPTO_SYMBOL_MARKERS = ('-USD', '-EUR')
+ETF_NAME_MARKERS = ('etf', 'fund', 'index')
+
 class TickerService:
     """Service amélioré pour la recherche et validation des tickers"""
     
     @staticmethod
-    def search_tickers(query: str, limit: int = 10) -> List[Dict]:
-        """Recherche avancée de tickers avec multiple sources"""
+    def search_tickers(query: str, limit: int = 10, flush: bool = True) -> List[Dict]:
+        """Recherche avancée de tickers avec multiple sources
+
+        Volontairement non mise en cache : yahoo_search et les métadonnées le sont déjà,
+        et un échec Yahoo (ex. limite de requêtes) ne doit pas figer un résultat dégradé.
+        flush=False laisse à l'appelant (traitement par lot) l'écriture du cache disque.
+        """
         results = []
         
         # Source 1: Yahoo Finance Search API
         try:
-            url = f"https://query2.finance.yahoo.com/v1/finance/search?q={query}&quotesCount={limit}"
-            response = requests.get(url, timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                quotes = data.get("quotes", [])
-                
-                for quote in quotes:
-                    if quote.get('symbol') and quote.get('shortname'):
-                        results.append({
-                            'symbol': quote['symbol'],
-                            'name': quote['shortname'],
-                            'type': quote.get('typeDisp', 'Stock'),
-                            'exchange': quote.get('exchange', 'Unknown'),
-                            'source': 'Yahoo'
-                        })
+            results = [
+                {
+                    'symbol': quote['symbol'],
+                    'name': quote['shortname'],
+                    'type': quote.get('typeDisp', 'Stock'),
+                    'exchange': quote.get('exchange', 'Unknown'),
+                    'source': 'Yahoo'
+                }
+                for quote in TickerService.yahoo_search(query, limit)
+                if quote.get('symbol') and quote.get('shortname')
+            ]
         except Exception as e:
             st.warning(f"Erreur lors de la recherche Yahoo: {e}")
         
         # Source 2: Recherche par pattern (pour les tickers connus)
         pattern_results = TickerService._pattern_search(query)
         results.extend(pattern_results)
+        if flush:
+            _ticker_metadata_cache().flush()
         
-        # Déduplication et tri
-        seen = set()
-        unique_results = []
+        # Déduplication : la première occurrence de chaque symbole l'emporte (ordre d'insertion conservé)
+        unique_results = {}
         for item in results:
-            if item['symbol'] not in seen:
-                seen.add(item['symbol'])
-                unique_results.append(item)
+            unique_results.setdefault(item['symbol'], item)
         
-        return unique_results[:limit]
+        return list(unique_results.values())[:limit]
+    
+    @staticmethod
+    @st.cache_resource
+    def _http_session() -> requests.Session:
+        """Session HTTP partagée (keep-alive), avec cache SQLite persistant si requests_cache est installé"""
+        if REQUESTS_CACHE_AVAILABLE:
+            os.makedirs('.cache', exist_ok=True)
+            session = requests_cache.CachedSession(
+                os.path.join('.cache', 'http_cache'),
+                backend='sqlite',
+                expire_after=3600
+            )
+        else:
+            session = requests.Session()
+        
+        # Pool de connexions dimensionné pour les workers concurrents (10 par défaut dans requests)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_MAX_WORKERS)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+    
+    @staticmethod
+    @st.cache_data(ttl=3600, show_spinner=False)
+    def yahoo_search(query: str, limit: int = 10) -> List[Dict]:
+        """Résultats bruts de l'API de recherche Yahoo Finance - les erreurs ne sont pas mises en cache"""
+        response = TickerService._http_session().get(
+            "https://query2.finance.yahoo.com/v1/finance/search",
+            params={'q': query, 'quotesCount': limit},
+            timeout=5
+        )
+        response.raise_for_status()
+        return response.json().get("quotes", [])
+    
+    @staticmethod
+    def search_tickers_many(queries: List[str], limit: int = 10,
+                            max_workers: int = HTTP_MAX_WORKERS) -> List[List[Dict]]:
+        """Recherche de plusieurs tickers en parallèle (les appels réseau se recouvrent)"""
+        results = _thread_map(lambda query: TickerService.search_tickers(query, limit=limit, flush=False),
+                              queries, max_workers)
+        _ticker_metadata_cache().flush()  # Une seule écriture disque pour tout le lot
+        return results
+    
+    @staticmethod
+    def validate_tickers_many(symbols: List[str], max_workers: int = HTTP_MAX_WORKERS) -> List[Dict]:
+        """Validation de plusieurs tickers en parallèle"""
+        results = _thread_map(lambda symbol: TickerService.validate_ticker(symbol, flush=False),
+                              symbols, max_workers)
+        _ticker_metadata_cache().flush()  # Une seule écriture disque pour tout le lot
+        return results
     
     @staticmethod
     def _pattern_search(query: str) -> List[Dict]:
@@ -703,39 +883,38 @@ class TickerService:
     'Zalando': 'ZAL'
 }
         query_upper = query.upper()
-        results = []
+        matches = [(name, symbol) for name, symbol in common_tickers.items()
+                   if query_upper in name or query_upper in symbol]
+        if not matches:
+            return []
         
-        for name, symbol in common_tickers.items():
-            if query_upper in name or query_upper in symbol:
-                try:
-                    ticker = yf.Ticker(symbol)
-                    info = ticker.info
-                    results.append({
-                        'symbol': symbol,
-                        'name': info.get('shortName', name),
-                        'type': 'Stock',
-                        'exchange': info.get('exchange', 'Unknown'),
-                        'source': 'Pattern'
-                    })
-                except:
-                    continue
+        def fetch(match):
+            name, symbol = match
+            try:
+                metadata = TickerService._get_ticker_metadata(symbol)
+            except Exception:
+                return None
+            return {
+                'symbol': symbol,
+                # Nom Yahoo si connu, sinon le nom courant de la table (le nom par défaut est le ticker)
+                'name': metadata['name'] if metadata.get('name') not in (None, symbol) else name,
+                'type': 'Stock',
+                'exchange': metadata.get('exchange', 'Unknown'),
+                'source': 'Pattern'
+            }
         
-        return results
+        # Appels réseau concurrents (limités à 5 pour ménager l'API)
+        return [result for result in _thread_map(fetch, matches, max_workers=5) if result is not None]
     
     @staticmethod
-    def validate_ticker(symbol: str) -> Dict:
-        """Validation complète d'un ticker avec données financières"""
+    def validate_ticker(symbol: str, flush: bool = True) -> Dict:
+        """Validation complète d'un ticker avec données financières (flush=False : écriture disque différée)"""
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
-            
-            # Vérification des données essentielles
-            current_price = info.get('currentPrice') or info.get('regularMarketPrice')
-            if not current_price:
-                # Tentative via historical data
-                hist = ticker.history(period="5d")
-                if not hist.empty:
-                    current_price = hist['Close'].iloc[-1]
+            # Métadonnées stables (cache 1h) et prix volatil (cache 1 min) mis en cache séparément
+            metadata = TickerService._get_ticker_metadata(symbol)
+            if flush:
+                _ticker_metadata_cache().flush()
+            current_price = TickerService._get_current_price(symbol)
             
             if not current_price:
                 return {'valid': False, 'error': 'Prix indisponible'}
@@ -743,20 +922,94 @@ class TickerService:
             return {
                 'valid': True,
                 'symbol': symbol,
-                'name': info.get('shortName', symbol),
-                'price': float(current_price),
-                'currency': info.get('currency', 'USD'),
-                'exchange': info.get('exchange', 'Unknown'),
-                'sector': info.get('sector', 'Unknown'),
-                'industry': info.get('industry', 'Unknown'),
-                'market_cap': info.get('marketCap'),
-                'isin': info.get('isin', 'Unknown'),
-                'type': TickerService._classify_asset_type(info)
+                'name': metadata['name'],
+                'price': current_price,
+                'currency': metadata['currency'],
+                'exchange': metadata['exchange'],
+                'sector': metadata['sector'],
+                'industry': metadata['industry'],
+                'market_cap': metadata['market_cap'],
+                'isin': metadata['isin'],
+                'type': metadata['type']
             }
             
         except Exception as e:
             return {'valid': False, 'error': str(e)}
     
+    @staticmethod
+    @st.cache_data(ttl=3600, show_spinner=False)
+    def _get_ticker_metadata(symbol: str) -> Dict:
+        """Métadonnées d'un ticker (nom, secteur, place...) - les erreurs ne sont pas mises en cache"""
+        disk_cache = _ticker_metadata_cache()
+        metadata = disk_cache.get(symbol)
+        if metadata is not None:
+            return metadata
+        
+        info = yf.Ticker(symbol).info
+        metadata = {
+            'name': info.get('shortName', symbol),
+            'currency': info.get('currency', 'USD'),
+            'exchange': info.get('exchange', 'Unknown'),
+            'sector': info.get('sector', 'Unknown'),
+            'industry': info.get('industry', 'Unknown'),
+            'market_cap': info.get('marketCap'),
+            'isin': info.get('isin', 'Unknown'),
+            'type': TickerService._classify_asset_type(info)
+        }
+        # Persisté 90 jours seulement si Yahoo a identifié l'instrument (pas de valeurs par défaut figées)
+        if info.get('shortName') or info.get('quoteType'):
+            disk_cache.set(symbol, metadata)
+        return metadata
+    
+    @staticmethod
+    @st.cache_data(ttl=60, show_spinner=False)
+    def _get_current_price(symbol: str) -> Optional[float]:
+        """Prix courant d'un ticker, None si indisponible"""
+        ticker = yf.Ticker(symbol)
+        
+        # fast_info : requête légère sur le dernier cours, sans recharger tout .info (quoteSummary)
+        try:
+            current_price = ticker.fast_info['last_price']
+        except Exception:
+            current_price = None
+        if not current_price or not np.isfinite(current_price):
+            # Tentative via historical data
+            current_price = None
+            hist = ticker.history(period="5d")
+            if not hist.empty:
+                current_price = hist['Close'].iloc[-1]
+        
+        return float(current_price) if current_price else None
+    
+    @staticmethod
+    @st.cache_data(ttl=60, show_spinner=False)
+    def get_last_prices(symbols: Tuple[str, ...]) -> Dict[str, float]:
+        """Derniers cours de clôture de plusieurs tickers en un seul téléchargement groupé"""
+        symbols = list(dict.fromkeys(symbol for symbol in symbols if symbol))
+        if not symbols:
+            return {}
+        
+        # 5 jours pour toujours disposer d'une clôture (week-ends, jours fériés)
+        data = yf.download(symbols, period='5d', progress=False, threads=True,
+                           group_by='ticker', auto_adjust=False)
+        if data.empty:
+            return {}
+        
+        prices = {}
+        if isinstance(data.columns, pd.MultiIndex):
+            available = set(data.columns.get_level_values(0))
+            for symbol in symbols:
+                if symbol in available:
+                    close = data[symbol]['Close'].dropna()
+                    if not close.empty:
+                        prices[symbol] = float(close.iloc[-1])
+        else:
+            close = data['Close'].dropna()
+            if not close.empty:
+                prices[symbols[0]] = float(close.iloc[-1])
+        
+        return prices
+    
     @staticmethod
     def _classify_asset_type(info: Dict) -> str:
         """Classification automatique du type d'actif"""
@@ -766,11 +1019,11 @@ class TickerService:
         name = info.get('shortName', '').lower()
         
         # Crypto
-        if any(x in symbol for x in ['-USD', '-EUR']) or 'crypto' in name:
+        if any(x in symbol for x in CRYPTO_SYMBOL_MARKERS) or 'crypto' in name:
             return 'Cryptocurrency'
         
         # ETF
-        if any(x in name for x in ['etf', 'fund', 'index']):
+        if any(x in name for x in ETF_NAME_MARKERS):
             return 'ETF'
         
         # REIT
@@ -778,23 +1031,128 @@ class TickerService:
             return 'REIT'
         
         # Par secteur
-        sector_mapping = {
-            'technology': 'Tech Stock',
-            'healthcare': 'Healthcare Stock',
-            'financial': 'Financial Stock',
-            'energy': 'Energy Stock',
-            'consumer': 'Consumer Stock',
-            'industrial': 'Industrial Stock',
-            'utilities': 'Utility Stock',
-            'materials': 'Materials Stock',
-            'telecommunication': 'Telecom Stock'
-        }
-        
-        for key, value in sector_mapping.items():
-            if key in sector:
-                return value
-        
-        return 'Stock'
+        return next((value for key, value in SECTOR_TO_ASSET_TYPE.items() if key in sector), 'Stock')
+
+@st.cache_resource(show_spinner=False)
+def _concentration_kernel():
+    """Noyau Numba HHI/entropie/top 3, compilé et préchauffé une seule fois par processus (None sans Numba)
+
+    Streamlit réexécute le script à chaque rerun : un @njit défini au niveau du module serait
+    recréé (et recompilé) à chaque interaction, d'où la fabrique mise en cache.
+    """
+    if not NUMBA_AVAILABLE:
+        return None
+    
+    # fastmath sans 'nnan'/'ninf' : les sentinelles -inf du top 3 restent valides
+    @njit(fastmath={'reassoc', 'contract', 'arcp', 'nsz', 'afn'},
+          error_model='numpy', boundscheck=False)
+    def kernel(weights):
+        """Calcule HHI, entropie et top 3 en un seul passage sur les poids (float32 contigus)"""
+        hhi = np.float32(0.0)
+        entropy = np.float32(0.0)
+        top1 = np.float32(-np.inf)
+        top2 = np.float32(-np.inf)
+        top3 = np.float32(-np.inf)
+        for i in range(weights.shape[0]):
+            w = weights[i]
+            hhi += w * w
+            entropy -= w * np.log(w + np.float32(1e-10))
+            if w > top1:
+                top3 = top2
+                top2 = top1
+                top1 = w
+            elif w > top2:
+                top3 = top2
+                top2 = w
+            elif w > top3:
+                top3 = w
+        top3_weight = np.float32(0.0)
+        if top1 > -np.inf:
+            top3_weight += top1
+        if top2 > -np.inf:
+            top3_weight += top2
+        if top3 > -np.inf:
+            top3_weight += top3
+        return hhi, entropy, top3_weight
+    
+    # Compilation immédiate pour que la première analyse ne paie pas le JIT
+    kernel(np.full(10, 0.1, dtype=np.float32))
+    return kernel
+
+
+# Mapping des suffixes de symboles vers les régions
+SYMBOL_SUFFIX_TO_REGION = {
+    # États-Unis (suffixe explicite ; sans suffixe, voir _region_from_symbol)
+    '.US': 'USA',
+
+    # Europe
+    '.PA': 'France',      # Paris
+    '.L': 'UK',           # London
+    '.DE': 'Germany',     # Frankfurt
+    '.MI': 'Italy',       # Milan
+    '.AS': 'Netherlands', # Amsterdam
+    '.SW': 'Switzerland', # Swiss
+    '.MC': 'Spain',       # Madrid
+    '.BR': 'Belgium',     # Brussels
+    '.VI': 'Austria',     # Vienna
+    '.HE': 'Finland',     # Helsinki
+    '.ST': 'Sweden',      # Stockholm
+    '.OL': 'Norway',      # Oslo
+    '.CO': 'Denmark',     # Copenhagen
+
+    # Asie
+    '.T': 'Japan',        # Tokyo
+    '.HK': 'Hong Kong',   # Hong Kong
+    '.SS': 'China',       # Shanghai
+    '.SZ': 'China',       # Shenzhen
+    '.KS': 'South Korea', # Korea
+    '.SI': 'Singapore',   # Singapore
+    '.AX': 'Australia',   # Australia
+    '.NZ': 'New Zealand', # New Zealand
+
+    # Amérique du Nord (autres)
+    '.TO': 'Canada',      # Toronto
+    '.V': 'Canada',       # Vancouver
+
+    # Amérique du Sud
+    '.SA': 'Brazil',      # São Paulo
+    '.MX': 'Mexico',      # Mexico
+
+    # Autres
+    '.JO': 'South Africa', # Johannesburg
+    '.TA': 'Israel',      # Tel Aviv
+}
+
+# Suffixe de place de cotation en fin de symbole (ex. ".PA", ".HK")
+_SYMBOL_SUFFIX_RE = re.compile(r'(\.[A-Z]+)$')
+_CRYPTO_RE = re.compile(r'BTC|ETH|ADA|DOT')
+
+@lru_cache(maxsize=4096)
+def _region_from_symbol(symbol) -> str:
+    """Détermine la région à partir du suffixe du symbole"""
+    if pd.isna(symbol) or symbol == '':
+        return 'Unknown'
+    
+    symbol = str(symbol).upper()
+    
+    # Recherche du suffixe dans le symbole
+    match = _SYMBOL_SUFFIX_RE.search(symbol)
+    if match:
+        region = SYMBOL_SUFFIX_TO_REGION.get(match.group(1))
+        if region is not None:
+            return region
+    
+    # Si aucun suffixe trouvé, vérifier quelques patterns spéciaux
+    if _CRYPTO_RE.search(symbol):
+        return 'Cryptocurrency'
+    elif len(symbol) <= 5 and '.' not in symbol:
+        return 'USA'  # Symboles courts sans suffixe = USA
+    else:
+        return 'Other'
+
+# Paliers HHI (bornes strictes) et niveaux de concentration associés
+CONCENTRATION_THRESHOLDS = (0.10, 0.15, 0.25)
+CONCENTRATION_LABELS = ("Bien Diversifié", "Modérément Concentré", "Concentré", "Très Concentré")
 
 class DiversificationAnalyzer:
     """Analyseur de diversification avancé avec correction géographique"""
@@ -811,19 +1169,31 @@ class DiversificationAnalyzer:
                 'concentration_level': 'Non calculé'
             }
         
-        weights = df['weight'].values
-        
-        # Indice Herfindahl-Hirschman
-        hhi = np.sum(weights ** 2)
+        return _cached_concentration(tuple(df['weight'].to_numpy(dtype=np.float64)))
+    
+    @staticmethod
+    def _concentration_from_weights(weights: np.ndarray) -> Dict:
+        """Métriques de concentration à partir du vecteur de poids"""
+        kernel = _concentration_kernel()
+        if kernel is not None:
+            # Noyau fusionné : HHI, entropie et top 3 en une seule traversée
+            hhi, entropy, top3_weight = (
+                float(x) for x in kernel(np.ascontiguousarray(weights, dtype=np.float32))
+            )
+        else:
+            # Indice Herfindahl-Hirschman (produit scalaire BLAS)
+            hhi = float(np.dot(weights, weights))
+            
+            # Top 3 concentration (sélection O(N) au lieu d'un tri)
+            k = min(3, len(weights))
+            top3_weight = float(np.partition(weights, len(weights) - k)[-k:].sum()) if k else 0.0
+            
+            # Entropy (diversification Shannon)
+            entropy = -np.sum(weights * np.log(weights + 1e-10))
         
         # Nombre effectif d'actions
         effective_stocks = 1 / hhi if hhi > 0 else 0
         
-        # Top 3 concentration
-        top3_weight = weights[np.argsort(weights)[-3:]].sum()
-        
-        # Entropy (diversification Shannon)
-        entropy = -np.sum(weights * np.log(weights + 1e-10))
         max_entropy = -np.log(1/len(weights))
         normalized_entropy = entropy / max_entropy if max_entropy > 0 else 0
         
@@ -838,14 +1208,7 @@ class DiversificationAnalyzer:
     @staticmethod
     def _get_concentration_level(hhi: float) -> str:
         """Détermine le niveau de concentration"""
-        if hhi > 0.25:
-            return "Très Concentré"
-        elif hhi > 0.15:
-            return "Concentré"
-        elif hhi > 0.10:
-            return "Modérément Concentré"
-        else:
-            return "Bien Diversifié"
+        return CONCENTRATION_LABELS[bisect_left(CONCENTRATION_THRESHOLDS, hhi)]
     
     @staticmethod
     def analyze_sector_diversification(df: pd.DataFrame) -> pd.DataFrame:
@@ -853,14 +1216,13 @@ class DiversificationAnalyzer:
         if 'sector' not in df.columns or 'weight' not in df.columns:
             return pd.DataFrame()
         
-        sector_analysis = df.groupby('sector').agg({
-            'weight': 'sum',
-            'amount': 'sum',
-            'perf': 'mean',
-            'name': 'count'
-        }).round(4)
+        sector_analysis = df.groupby('sector', observed=True, sort=False).agg(
+            Weight=('weight', 'sum'),
+            Amount=('amount', 'sum'),
+            Avg_Performance=('perf', 'mean'),
+            Count=('name', 'count')
+        ).round(4)
         
-        sector_analysis.columns = ['Weight', 'Amount', 'Avg_Performance', 'Count']
         sector_analysis['Weight_Pct'] = sector_analysis['Weight'] * 100
         
         return sector_analysis.sort_values('Weight', ascending=False)
@@ -871,95 +1233,80 @@ class DiversificationAnalyzer:
         if 'symbol' not in df.columns or 'weight' not in df.columns:
             return pd.DataFrame()
         
-        # Mapping des suffixes de symboles vers les régions
-        symbol_to_region = {
-            # États-Unis (pas de suffixe ou suffixes US)
-            '': 'USA',
-            '.US': 'USA',
-            
-            # Europe
-            '.PA': 'France',      # Paris
-            '.L': 'UK',           # London
-            '.DE': 'Germany',     # Frankfurt
-            '.MI': 'Italy',       # Milan
-            '.AS': 'Netherlands', # Amsterdam
-            '.SW': 'Switzerland', # Swiss
-            '.MC': 'Spain',       # Madrid
-            '.BR': 'Belgium',     # Brussels
-            '.VI': 'Austria',     # Vienna
-            '.HE': 'Finland',     # Helsinki
-            '.ST': 'Sweden',      # Stockholm
-            '.OL': 'Norway',      # Oslo
-            '.CO': 'Denmark',     # Copenhagen
-            
-            # Asie
-            '.T': 'Japan',        # Tokyo
-            '.HK': 'Hong Kong',   # Hong Kong
-            '.SS': 'China',       # Shanghai
-            '.SZ': 'China',       # Shenzhen
-            '.KS': 'South Korea', # Korea
-            '.SI': 'Singapore',   # Singapore
-            '.AX': 'Australia',   # Australia
-            '.NZ': 'New Zealand', # New Zealand
-            
-            # Amérique du Nord (autres)
-            '.TO': 'Canada',      # Toronto
-            '.V': 'Canada',       # Vancouver
-            
-            # Amérique du Sud
-            '.SA': 'Brazil',      # São Paulo
-            '.MX': 'Mexico',      # Mexico
-            
-            # Autres
-            '.JO': 'South Africa', # Johannesburg
-            '.TA': 'Israel',      # Tel Aviv
-        }
-        
-        # Fonction pour déterminer la région à partir du symbole
-        def get_region_from_symbol(symbol):
-            if pd.isna(symbol) or symbol == '':
-                return 'Unknown'
-            
-            symbol = str(symbol).upper()
-            
-            # Recherche du suffixe dans le symbole
-            for suffix, region in symbol_to_region.items():
-                if suffix == '':  # Symboles sans suffixe (USA par défaut)
-                    continue
-                elif symbol.endswith(suffix):
-                    return region
-            
-            # Si aucun suffixe trouvé, vérifier quelques patterns spéciaux
-            if any(pattern in symbol for pattern in ['BTC', 'ETH', 'ADA', 'DOT']):
-                return 'Cryptocurrency'
-            elif len(symbol) <= 5 and '.' not in symbol:
-                return 'USA'  # Symboles courts sans suffixe = USA
-            else:
-                return 'Other'
-        
-        # Application de la fonction
-        df_copy = df.copy()
-        df_copy['region'] = df_copy['symbol'].apply(get_region_from_symbol)
+        # Ajout de la région sans copie complète du portefeuille
+        df_geo = df.assign(region=df['symbol'].map(_region_from_symbol))
         
         # Regroupement par région
-        geo_analysis = df_copy.groupby('region').agg({
-            'weight': 'sum',
-            'amount': 'sum',
-            'perf': 'mean',
-            'name': 'count'
-        }).round(4)
-        
-        geo_analysis.columns = ['Weight', 'Amount', 'Avg_Performance', 'Count']
+        geo_analysis = df_geo.groupby('region', observed=True, sort=False).agg(
+            Weight=('weight', 'sum'),
+            Amount=('amount', 'sum'),
+            Avg_Performance=('perf', 'mean'),
+            Count=('name', 'count')
+        ).round(4)
+        
         geo_analysis['Weight_Pct'] = geo_analysis['Weight'] * 100
         
         return geo_analysis.sort_values('Weight', ascending=False)
 
+@st.cache_data(show_spinner=False, max_entries=32)
+def _cached_concentration(weights: Tuple[float, ...]) -> Dict:
+    """Métriques de concentration, recalculées seulement si les poids changent"""
+    return DiversificationAnalyzer._concentration_from_weights(np.array(weights, dtype=np.float64))
+
+def _hash_frame(df: pd.DataFrame) -> bytes:
+    """Empreinte du contenu d'un DataFrame (colonnes, index et valeurs) pour les clés de cache"""
+    digest = hashlib.blake2b(repr(tuple(df.columns)).encode(), digest_size=16)
+    digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return digest.digest()
+
+@st.cache_data(show_spinner=False, max_entries=32, hash_funcs={pd.DataFrame: _hash_frame})
+def _cached_diversification_analyses(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Analyses sectorielle et géographique, recalculées seulement si le portefeuille change"""
+    return (DiversificationAnalyzer.analyze_sector_diversification(df),
+            DiversificationAnalyzer.analyze_geographic_diversification(df))
+
+def _weighted_sum(w_col: pd.Series, x_col: pd.Series) -> float:
+    """Somme pondérée de deux colonnes via un seul produit scalaire BLAS (NaN traités comme 0)"""
+    return float(np.dot(
+        w_col.to_numpy(dtype=np.float64, na_value=0.0),
+        x_col.to_numpy(dtype=np.float64, na_value=0.0)
+    ))
+
+
+@dataclass
+class PortfolioArrays:
+    """Tableaux NumPy du portefeuille calculés une fois et partagés entre les analyses"""
+    perf: np.ndarray
+    weight: np.ndarray
+    amount: np.ndarray
+    total_value: float
+
+
 class PortfolioManager:
     """Gestionnaire de portefeuille avec calcul des rendements annualisés"""
     
     def __init__(self):
         if 'portfolio_df' not in st.session_state:
             st.session_state.portfolio_df = pd.DataFrame()
+        # Lignes ajoutées pas encore matérialisées dans portfolio_df
+        if 'portfolio_rows' not in st.session_state:
+            st.session_state.portfolio_rows = []
+    
+    @property
+    def portfolio_df(self) -> pd.DataFrame:
+        """DataFrame du portefeuille, matérialisé une seule fois à partir des lignes en attente"""
+        pending_rows = st.session_state.portfolio_rows
+        if pending_rows:
+            new_rows = pd.DataFrame(pending_rows)
+            if st.session_state.portfolio_df.empty:
+                st.session_state.portfolio_df = new_rows
+            else:
+                st.session_state.portfolio_df = pd.concat([
+                    st.session_state.portfolio_df,
+                    new_rows
+                ], ignore_index=True)
+            st.session_state.portfolio_rows = []
+        return st.session_state.portfolio_df
     
     @staticmethod
     def calculate_annualized_return(initial_value: float, final_value: float, days_held: int) -> float:
@@ -1036,22 +1383,90 @@ class PortfolioManager:
             'annualized_return': annualized_return
         }
 
-    # Ajout au DataFrame
-        if st.session_state.portfolio_df.empty:
-            st.session_state.portfolio_df = pd.DataFrame([new_row])
-        else:
-            st.session_state.portfolio_df = pd.concat([
-                st.session_state.portfolio_df,
-                pd.DataFrame([new_row])
-            ], ignore_index=True)
+    # Ajout en O(1) : le DataFrame n'est reconstruit qu'à la lecture de portfolio_df
+        st.session_state.portfolio_rows.append(new_row)
+        st.session_state.pop('_pm_fp', None)
 
         return True
 
 
+    def update_portfolio_metrics(self) -> Dict:
+        """Met à jour les poids et performances des positions et retourne les métriques globales"""
+        df = self.portfolio_df
+        
+        metrics = {
+            'total_value': 0.0,
+            'portfolio_performance': 0.0,
+            'annualized_return': 0.0,
+            'total_initial_value': 0.0,
+            'total_current_value': 0.0,
+            'arrays': None
+        }
+        
+        if df.empty:
+            return metrics
+        
+        amount_is_derived = 'quantity' in df.columns and 'lastPrice' in df.columns
+        
+        # Empreinte des colonnes d'entrée : rien à recalculer si le portefeuille n'a pas changé
+        fingerprint_cols = [
+            col for col in ('amount', 'lastPrice', 'buyingPrice', 'quantity', 'annualized_return')
+            if col in df.columns and not (col == 'amount' and amount_is_derived)
+        ]
+        fingerprint = (
+            len(df),
+            tuple(fingerprint_cols),
+            hash(df[fingerprint_cols].to_numpy(dtype=np.float64).tobytes())
+        )
+        if st.session_state.get('_pm_fp') == fingerprint and 'weight_pct' in df.columns:
+            # Copie : les appelants complètent le dict (ex. métriques annualisées)
+            return dict(st.session_state['_pm_metrics'])
+        
+        # Montants valorisés au dernier prix connu
+        if amount_is_derived:
+            df['amount'] = df['quantity'].to_numpy(dtype=np.float64) * df['lastPrice'].to_numpy(dtype=np.float64)
+        
+        if 'amount' not in df.columns:
+            return metrics
+        
+        # Calculs sur les tableaux NumPy sous-jacents plutôt que sur des Series temporaires
+        amount = df['amount'].to_numpy(dtype=np.float64)
+        total_value = float(np.nansum(amount))
+        n_positions = len(df)
+        
+        if 'lastPrice' in df.columns and 'buyingPrice' in df.columns:
+            last = df['lastPrice'].to_numpy(dtype=np.float64)
+            buy = df['buyingPrice'].to_numpy(dtype=np.float64)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                perf = np.where(buy > 0, (last - buy) / buy * 100.0, 0.0)
+            perf = np.nan_to_num(perf, nan=0.0)
+            metrics['total_initial_value'] = float(np.nansum(df['quantity'].to_numpy(dtype=np.float64) * buy)) \
+                if 'quantity' in df.columns else 0.0
+        else:
+            perf = np.zeros(n_positions)
+        
+        weight = amount / total_value if total_value > 0 else np.zeros(n_positions)
+        
+        # Une seule affectation en bloc ; df est déjà le DataFrame de session_state
+        df[['weight', 'weight_pct', 'perf']] = np.column_stack([weight, weight * 100.0, perf])
+        
+        metrics['total_value'] = total_value
+        metrics['total_current_value'] = total_value
+        metrics['portfolio_performance'] = float(np.dot(weight, perf))
+        metrics['arrays'] = PortfolioArrays(perf=perf, weight=weight, amount=amount, total_value=total_value)
+        
+        if 'annualized_return' in df.columns:
+            annualized = np.nan_to_num(df['annualized_return'].to_numpy(dtype=np.float64), nan=0.0)
+            metrics['annualized_return'] = float(np.dot(weight, annualized))
+        
+        st.session_state['_pm_fp'] = fingerprint
+        st.session_state['_pm_metrics'] = dict(metrics)
+        return metrics
+
     def get_portfolio_annualized_metrics(self) -> Dict:
         """Retourne les métriques annualisées détaillées du portefeuille"""
         metrics = self.update_portfolio_metrics()
-        df = st.session_state.portfolio_df
+        df = self.portfolio_df
         
         if df.empty:
             return metrics
@@ -1132,62 +1547,80 @@ class PortfolioManager:
         
         col1, col2 = st.columns(2)
         
+        # Un seul bloc Markdown par colonne
         with col1:
-            st.write(f"**Âge du portefeuille:** {metrics['portfolio_age_years']:.1f} ans")
-            st.write(f"**Volatilité estimée:** {metrics['portfolio_volatility']:.2f}%")
-            st.write(f"**Rendement excédentaire:** {metrics['excess_return']:.2f}%")
+            st.markdown(
+                f"**Âge du portefeuille:** {metrics['portfolio_age_years']:.1f} ans\n\n"
+                f"**Volatilité estimée:** {metrics['portfolio_volatility']:.2f}%\n\n"
+                f"**Rendement excédentaire:** {metrics['excess_return']:.2f}%"
+            )
         
         with col2:
-            st.write(f"**Première acquisition:** {metrics['min_purchase_date']}")
-            st.write(f"**Dernière acquisition:** {metrics['max_purchase_date']}")
-            st.write(f"**Taux sans risque:** {metrics['risk_free_rate']:.1f}%")
+            st.markdown(
+                f"**Première acquisition:** {metrics['min_purchase_date']}\n\n"
+                f"**Dernière acquisition:** {metrics['max_purchase_date']}\n\n"
+                f"**Taux sans risque:** {metrics['risk_free_rate']:.1f}%"
+            )
         
         # Tableau détaillé des positions
-        if not st.session_state.portfolio_df.empty:
+        if not self.portfolio_df.empty:
             st.subheader("Détail par position")
             
-            display_df = st.session_state.portfolio_df[[
-                'symbol', 'quantity', 'buyingPrice', 'lastPrice', 
-                'perf', 'annualized_return', 'days_held', 'weight_pct'
-            ]].copy()
+            df = self.portfolio_df
             
-            display_df.columns = [
-                'Symbole', 'Quantité', 'Prix d\'achat', 'Prix actuel',
-                'Performance (%)', 'Rendement annualisé (%)', 'Jours détention', 'Poids (%)'
-            ]
+            # La durée de détention n'est pas stockée dans le portefeuille : dérivée de la date d'achat
+            days_held = (pd.Timestamp.now().normalize() - pd.to_datetime(df['purchase_date'])).dt.days
             
-            # Formatage des colonnes
-            display_df['Prix d\'achat'] = display_df['Prix d\'achat'].apply(lambda x: f"${x:.2f}")
-            display_df['Prix actuel'] = display_df['Prix actuel'].apply(lambda x: f"${x:.2f}")
-            display_df['Performance (%)'] = display_df['Performance (%)'].apply(lambda x: f"{x:.2f}%")
-            display_df['Rendement annualisé (%)'] = display_df['Rendement annualisé (%)'].apply(lambda x: f"{x:.2f}%")
-            display_df['Poids (%)'] = display_df['Poids (%)'].apply(lambda x: f"{x:.1f}%")
+            display_df = pd.DataFrame({
+                'Symbole': df['symbol'],
+                'Quantité': df['quantity'],
+                'Prix d\'achat': df['buyingPrice'],
+                'Prix actuel': df['lastPrice'],
+                'Performance (%)': df['perf'],
+                'Rendement annualisé (%)': df['annualized_return'],
+                'Jours détention': days_held,
+                'Poids (%)': df['weight_pct']
+            })
             
-            st.dataframe(display_df, use_container_width=True)
+            # Formatage des colonnes côté affichage : pas de chaîne construite ligne par ligne en Python
+            st.dataframe(
+                display_df,
+                use_container_width=True,
+                column_config={
+                    'Prix d\'achat': st.column_config.NumberColumn(format="$%.2f"),
+                    'Prix actuel': st.column_config.NumberColumn(format="$%.2f"),
+                    'Performance (%)': st.column_config.NumberColumn(format="%.2f%%"),
+                    'Rendement annualisé (%)': st.column_config.NumberColumn(format="%.2f%%"),
+                    'Poids (%)': st.column_config.NumberColumn(format="%.1f%%")
+                }
+            )
 
     def get_risk_performance_metrics(self):
         """Calcule les métriques de risque et performance pour integration avec RiskPerformanceAnalyzer"""
-        if st.session_state.portfolio_df.empty:
+        if self.portfolio_df.empty:
             return pd.DataFrame()
         
-        df = st.session_state.portfolio_df.copy()
+        df = self.portfolio_df
         
-        # Préparation des données pour RiskPerformanceAnalyzer
-        df['perf'] = ((df['lastPrice'] - df['buyingPrice']) / df['buyingPrice'] * 100).fillna(0)
+        # Préparation des données pour RiskPerformanceAnalyzer (seules les colonnes utiles sont construites)
+        perf = ((df['lastPrice'] - df['buyingPrice']) / df['buyingPrice'] * 100).fillna(0)
         
         # Calcul des poids
         total_value = df['amount'].sum()
         if total_value > 0:
-            df['weight'] = (df['amount'] / total_value) * 100
+            weight = (df['amount'] / total_value) * 100
         else:
-            df['weight'] = 0
+            weight = 0
         
-        return df[['symbol', 'perf', 'weight']]
+        return pd.DataFrame({'symbol': df['symbol'], 'perf': perf, 'weight': weight}, index=df.index)
+
 def generate_recommendations(df: pd.DataFrame, concentration: Dict, 
-                           sector_analysis: pd.DataFrame, geo_analysis: pd.DataFrame):
+                           sector_analysis: pd.DataFrame, geo_analysis: pd.DataFrame,
+                           arrays: Optional[PortfolioArrays] = None):
     """Génère des recommandations personnalisées"""
     
     recommendations = []
+    n_positions = len(df)
     
     # Analyse de concentration
     if concentration['hhi'] > 0.25:
@@ -1222,25 +1655,26 @@ def generate_recommendations(df: pd.DataFrame, concentration: Dict,
             })
     
     # Nombre de positions
-    if len(df) < 10:
+    if n_positions < 10:
         recommendations.append({
             'type': 'info',
             'title': '📊 Nombre de positions',
-            'message': f"Avec {len(df)} positions, votre portefeuille pourrait bénéficier de plus de diversification. "
+            'message': f"Avec {n_positions} positions, votre portefeuille pourrait bénéficier de plus de diversification. "
                       f"Considérez ajouter 5-10 positions supplémentaires pour réduire le risque spécifique."
         })
-    elif len(df) > 50:
+    elif n_positions > 50:
         recommendations.append({
             'type': 'warning',
             'title': '📊 Trop de positions',
-            'message': f"Avec {len(df)} positions, votre portefeuille pourrait être trop complexe à gérer. "
+            'message': f"Avec {n_positions} positions, votre portefeuille pourrait être trop complexe à gérer. "
                       f"Considérez consolider vers 20-30 positions principales."
         })
     
     # Analyse des performances
-    if 'perf' in df.columns and len(df) > 0:
-        avg_perf = df['perf'].mean()
-        perf_std = df['perf'].std()
+    if (arrays is not None or 'perf' in df.columns) and n_positions > 0:
+        perf_arr = arrays.perf if arrays is not None else df['perf'].to_numpy(dtype=np.float64)
+        avg_perf = perf_arr.mean()
+        perf_std = perf_arr.std(ddof=1) if perf_arr.size > 1 else np.nan
         
         if perf_std > 50:  # Volatilité élevée
             recommendations.append({
@@ -1251,79 +1685,76 @@ def generate_recommendations(df: pd.DataFrame, concentration: Dict,
             })
         
         # Positions perdantes
-        losing_positions = df[df['perf'] < -20]
-        if len(losing_positions) > len(df) * 0.3:  # Plus de 30% de positions perdantes
+        n_losing = int(np.count_nonzero(perf_arr < -20))
+        if n_losing > perf_arr.size * 0.3:  # Plus de 30% de positions perdantes
             recommendations.append({
                 'type': 'warning',
                 'title': '📉 Positions perdantes',
-                'message': f"{len(losing_positions)} positions affichent des pertes > 20%. "
+                'message': f"{n_losing} positions affichent des pertes > 20%. "
                           f"Évaluez si certaines doivent être soldées pour limiter les pertes."
             })
     
     # Recommandations positives
-    if concentration['hhi'] < 0.10 and len(df) >= 15:
+    if concentration['hhi'] < 0.10 and n_positions >= 15:
         recommendations.append({
             'type': 'success',
             'title': '✅ Bonne diversification',
             'message': "Votre portefeuille présente une bonne diversification avec un risque de concentration faible."
         })
     
-    if not sector_analysis.empty and len(sector_analysis) >= 5:
+    n_sectors = len(sector_analysis)
+    if n_sectors >= 5:
         recommendations.append({
             'type': 'success',
             'title': '✅ Diversification sectorielle',
-            'message': f"Excellente diversification avec {len(sector_analysis)} secteurs représentés."
+            'message': f"Excellente diversification avec {n_sectors} secteurs représentés."
         })
     
-    # Affichage des recommandations
+    # Affichage des recommandations (un seul élément Streamlit pour toutes les cartes)
     if recommendations:
-        for rec in recommendations:
-            if rec['type'] == 'warning':
-                st.markdown(f"""
-                <div class="warning-card">
+        card_classes = {'warning': 'warning-card', 'success': 'success-card', 'info': 'metric-card'}
+        cards_html = ''.join(
+            f"""
+                <div class="{card_classes.get(rec['type'], 'metric-card')}">
                     <h4>{rec['title']}</h4>
                     <p>{rec['message']}</p>
                 </div>
-                """, unsafe_allow_html=True)
-            elif rec['type'] == 'success':
-                st.markdown(f"""
-                <div class="success-card">
-                    <h4>{rec['title']}</h4>
-                    <p>{rec['message']}</p>
-                </div>
-                """, unsafe_allow_html=True)
-            else:  # info
-                st.markdown(f"""
-                <div class="metric-card">
-                    <h4>{rec['title']}</h4>
-                    <p>{rec['message']}</p>
-                </div>
-                """, unsafe_allow_html=True)
+                """
+            for rec in recommendations
+        )
+        st.markdown(cards_html, unsafe_allow_html=True)
     else:
         st.info("Aucune recommandation spécifique pour le moment.")
 
+# Colonnes requises avec leurs alias possibles
+COLUMN_MAPPING = {
+    'name': ['name', 'nom', 'title', 'security', 'instrument'],
+    'quantity': ['quantity', 'qty', 'quantite', 'shares', 'units'],
+    'date':['purchase_date', 'date'],
+    'buyingPrice': ['buyingPrice', 'prix_achat', 'purchase_price', 'cost'],
+    'lastPrice': ['lastPrice', 'prix_actuel', 'current_price', 'market_price'],
+    'isin': ['isin', 'ISIN'],
+    'symbol': ['symbol', 'ticker', 'symbole'], 
+    'annualized_return':['annualized_return']
+}
+
+# Alias (en minuscules) -> nom de colonne standard, construit une seule fois
+_ALIAS_MAP = {alias.lower(): standard for standard, aliases in COLUMN_MAPPING.items() for alias in aliases}
+
 def enhance_dataframe(df: pd.DataFrame) -> pd.DataFrame:
-    """Améliore automatiquement un DataFrame importé"""
-    
-    # Colonnes requises avec leurs alias possibles
-    column_mapping = {
-        'name': ['name', 'nom', 'title', 'security', 'instrument'],
-        'quantity': ['quantity', 'qty', 'quantite', 'shares', 'units'],
-        'date':['purchase_date', 'date'],
-        'buyingPrice': ['buyingPrice', 'prix_achat', 'purchase_price', 'cost'],
-        'lastPrice': ['lastPrice', 'prix_actuel', 'current_price', 'market_price'],
-        'isin': ['isin', 'ISIN'],
-        'symbol': ['symbol', 'ticker', 'symbole'], 
-        'annualized_return':['annualized_return']
-    }
+    """Améliore automatiquement un DataFrame importé
+    
+    Le DataFrame reçu n'est jamais modifié : le renommage initial produit le
+    nouveau DataFrame sur lequel portent toutes les modifications.
+    """
     
-    # Standardisation des noms de colonnes
-    df_enhanced = df.copy()
-    for standard_col, possible_names in column_mapping.items():
-        for col in df_enhanced.columns:
-            if col.lower() in [name.lower() for name in possible_names]:
-                df_enhanced = df_enhanced.rename(columns={col: standard_col})
-                break
+    # Standardisation des noms de colonnes (première colonne trouvée par nom standard)
+    rename = {}
+    for col in df.columns:
+        standard_col = _ALIAS_MAP.get(col.lower())
+        if standard_col is not None and standard_col not in rename.values():
+            rename[col] = standard_col
+    df_enhanced = df.rename(columns=rename)
     
     # Ajout des colonnes manquantes avec des valeurs par défaut
     required_columns = {
@@ -1339,40 +1770,75 @@ def enhance_dataframe(df: pd.DataFrame) -> pd.DataFrame:
         'variation': 0.0
     }
     
-    for col, default_value in required_columns.items():
-        if col not in df_enhanced.columns:
-            df_enhanced[col] = default_value
+    missing = {col: value for col, value in required_columns.items() if col not in df_enhanced.columns}
+    if missing:
+        df_enhanced = df_enhanced.assign(**missing)
     
     # Calculs automatiques
     if 'amount' not in df_enhanced.columns and 'quantity' in df_enhanced.columns and 'lastPrice' in df_enhanced.columns:
         df_enhanced['amount'] = df_enhanced['quantity'] * df_enhanced['lastPrice']
     
-    # Enrichissement automatique des symboles manquants
+    # Enrichissement automatique des symboles manquants (recherches groupées et parallèles)
     if 'symbol' in df_enhanced.columns and 'name' in df_enhanced.columns:
-        for idx, row in df_enhanced.iterrows():
-            if not row['symbol'] or row['symbol'] == '':
-                # Tentative de recherche automatique
-                try:
-                    search_results = TickerService.search_tickers(row['name'], limit=1)
-                    if search_results:
-                        df_enhanced.at[idx, 'symbol'] = search_results[0]['symbol']
-                        
-                        # Validation et enrichissement
-                        ticker_data = TickerService.validate_ticker(search_results[0]['symbol'])
-                        if ticker_data['valid']:
-                            df_enhanced.at[idx, 'sector'] = ticker_data.get('sector', 'Unknown')
-                            df_enhanced.at[idx, 'industry'] = ticker_data.get('industry', 'Unknown')
-                            df_enhanced.at[idx, 'asset_type'] = ticker_data.get('type', 'Stock')
-                            df_enhanced.at[idx, 'exchange'] = ticker_data.get('exchange', 'Unknown')
-                except:
-                    continue
+        df_enhanced['symbol'] = df_enhanced['symbol'].fillna('')
+        missing_mask = df_enhanced['symbol'].eq('')
+        names = df_enhanced.loc[missing_mask, 'name'].dropna().astype(str).unique().tolist()
+        
+        if names:
+            # Recherche d'un symbole par nom unique
+            search_results = TickerService.search_tickers_many(names, limit=1)
+            name_to_symbol = {
+                name: results[0]['symbol']
+                for name, results in zip(names, search_results) if results
+            }
+            
+            # Validation et enrichissement de chaque symbole trouvé
+            symbols = list(dict.fromkeys(name_to_symbol.values()))
+            validated = dict(zip(symbols, TickerService.validate_tickers_many(symbols)))
+            
+            enrichment = {}
+            for name, symbol in name_to_symbol.items():
+                record = {'symbol': symbol}
+                ticker_data = validated.get(symbol, {})
+                if ticker_data.get('valid'):
+                    record.update({
+                        'sector': ticker_data.get('sector', 'Unknown'),
+                        'industry': ticker_data.get('industry', 'Unknown'),
+                        'asset_type': ticker_data.get('type', 'Stock'),
+                        'exchange': ticker_data.get('exchange', 'Unknown')
+                    })
+                enrichment[name] = record
+            
+            # Application en une seule mise à jour vectorisée
+            missing_names = df_enhanced.loc[missing_mask, 'name']
+            matched = missing_names[missing_names.isin(list(enrichment))]
+            if not matched.empty:
+                enrich_df = pd.DataFrame.from_records(
+                    [enrichment[name] for name in matched],
+                    index=matched.index
+                )
+                df_enhanced.update(enrich_df)
     
     # Ajout de la colonne Tickers pour compatibilité
     if 'Tickers' not in df_enhanced.columns and 'symbol' in df_enhanced.columns:
         df_enhanced['Tickers'] = df_enhanced['symbol']
     
+    # Colonnes textuelles à faible cardinalité stockées en catégories (codes entiers)
+    for col in ('sector', 'industry', 'exchange', 'currency', 'asset_type'):
+        if col in df_enhanced.columns:
+            df_enhanced[col] = df_enhanced[col].astype('category')
+    
     return df_enhanced
 
+def _top_k_positions(values: np.ndarray, k: int) -> np.ndarray:
+    """Positions des k plus grandes valeurs, par ordre décroissant (sélection O(N) puis tri de k)"""
+    n = len(values)
+    if n == 0:
+        return np.array([], dtype=np.intp)
+    k = min(k, n)
+    top_idx = np.argpartition(-values, k - 1)[:k]
+    return top_idx[np.argsort(-values[top_idx], kind='stable')]
+
 def display_portfolio_summary(df: pd.DataFrame):
     """Affiche un résumé avancé du portefeuille"""
     st.header("📋 Résumé du portefeuille")
@@ -1387,7 +1853,8 @@ def display_portfolio_summary(df: pd.DataFrame):
     
     with col1:
         st.subheader("🔝 Top 5 positions")
-        top5 = df.nlargest(5, 'weight_pct')[['name', 'weight_pct', 'perf']]
+        top_idx = _top_k_positions(df['weight_pct'].to_numpy(dtype=np.float64), 5)
+        top5 = df.iloc[top_idx][['name', 'weight_pct', 'perf']]
         top5.columns = ['Action', 'Poids (%)', 'Performance (%)']
         st.dataframe(top5.style.format({
             'Poids (%)': '{:.1f}',
@@ -1396,7 +1863,8 @@ def display_portfolio_summary(df: pd.DataFrame):
     
     with col2:
         st.subheader("📉 Plus fortes baisses")
-        worst5 = df.nsmallest(5, 'perf')[['name', 'weight_pct', 'perf']]
+        worst_idx = _top_k_positions(-df['perf'].to_numpy(dtype=np.float64), 5)
+        worst5 = df.iloc[worst_idx][['name', 'weight_pct', 'perf']]
         worst5.columns = ['Action', 'Poids (%)', 'Performance (%)']
         st.dataframe(worst5.style.format({
             'Poids (%)': '{:.1f}',
@@ -1405,6 +1873,64 @@ def display_portfolio_summary(df: pd.DataFrame):
 
 from scipy.optimize import minimize
 
+# Cache disque (Parquet) des cours : survit aux redémarrages, même durée de validité que get_prices
+PRICE_CACHE_DIR = os.path.join('.cache', 'prices')
+PRICE_CACHE_MAX_AGE = 3600  # secondes
+
+def _price_cache_path(tickers: Tuple[str, ...], start_date, end_date) -> str:
+    """Fichier Parquet associé à une requête de cours (clé : tickers et bornes de dates)"""
+    key = hashlib.blake2b(repr((tickers, str(start_date), str(end_date))).encode(), digest_size=16).hexdigest()
+    return os.path.join(PRICE_CACHE_DIR, f"{key}.parquet")
+
+def _prune_price_cache() -> None:
+    """Supprime les fichiers de cours expirés (la clé contient la date de fin : un nouveau fichier par jour)"""
+    cutoff = time.time() - PRICE_CACHE_MAX_AGE
+    try:
+        entries = list(os.scandir(PRICE_CACHE_DIR))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass  # Déjà supprimé par une autre session
+
+@st.cache_data(ttl=3600, show_spinner="Téléchargement des cours...")
+def get_prices(tickers: Tuple[str, ...], start_date, end_date) -> pd.DataFrame:
+    """Cours de clôture de plusieurs tickers en un seul téléchargement groupé (une colonne par ticker)
+
+    Lève ValueError si rien n'est téléchargé : st.cache_data ne met pas les exceptions en cache,
+    un échec passager (limite de requêtes Yahoo) est donc retenté au prochain appel.
+    """
+    cache_path = _price_cache_path(tickers, start_date, end_date) if PARQUET_AVAILABLE else None
+    if cache_path is not None:
+        try:
+            if time.time() - os.path.getmtime(cache_path) < PRICE_CACHE_MAX_AGE:
+                return pd.read_parquet(cache_path)
+        except (OSError, ValueError):
+            pass  # Absent, expiré ou illisible : on retélécharge
+    
+    data = yf.download(list(tickers), start=start_date, end=end_date, progress=False, threads=True)
+    if data.empty:
+        raise ValueError("Aucune donnée téléchargée")
+    
+    close = data['Close']
+    # Selon la version de yfinance, un ticker seul donne une Series
+    if isinstance(close, pd.Series):
+        close = close.to_frame(name=tickers[0])
+    
+    if cache_path is not None:
+        try:
+            os.makedirs(PRICE_CACHE_DIR, exist_ok=True)
+            _prune_price_cache()
+            tmp_path = f"{cache_path}.tmp"
+            close.to_parquet(tmp_path)
+            os.replace(tmp_path, cache_path)
+        except (OSError, ValueError):
+            pass  # Le cache disque est facultatif (ex. système de fichiers en lecture seule)
+    return close
+
 class EfficientFrontier:
     @staticmethod
     def calculate_portfolio_performance(weights, mean_returns, cov_matrix):
@@ -1452,23 +1978,11 @@ class EfficientFrontier:
                 if not clean_tickers:
                     raise ValueError("Aucun ticker valide fourni")
                 
-                # Télécharger les données
-                data = yf.download(clean_tickers, start=start_date, end=end_date, progress=False)
-                
-                if data.empty:
-                    raise ValueError("Aucune donnée téléchargée")
-                
-                # Gérer le cas d'un seul ticker
-                if len(clean_tickers) == 1:
-                    if isinstance(data.columns, pd.MultiIndex):
-                        data = data.droplevel(1, axis=1)
-                    close_data = data['Close'].to_frame()
-                    close_data.columns = clean_tickers
-                else:
-                    close_data = data['Close']
+                # Télécharger les données (mis en cache si réussi ; un échec lève et sera retenté)
+                close_data = get_prices(tuple(clean_tickers), start_date, end_date)
                 
                 # Vérifier qu'on a des données valides
-                if close_data.empty or close_data.dropna().empty:
+                if close_data.dropna().empty:
                     raise ValueError("Données vides après nettoyage")
                 
                 return close_data
@@ -1646,58 +2160,164 @@ from scipy.optimize import minimize
 import warnings
 warnings.filterwarnings('ignore')
 
+@st.cache_resource(show_spinner=False)
+def _risk_kernel():
+    """Noyau Numba des métriques de risque, compilé et préchauffé une seule fois par processus (None sans Numba)"""
+    if not NUMBA_AVAILABLE:
+        return None
+    
+    # Pas de fastmath : VaR, CVaR et minimum doivent conserver la sémantique NaN/inf d'IEEE
+    @njit
+    def kernel(returns, weights):
+        """Accumulateurs des métriques de risque en boucle fusionnée (rendements et poids float64)"""
+        n = returns.shape[0]
+        mean_return = 0.0
+        for i in range(n):
+            mean_return += returns[i]
+        mean_return /= n
+        
+        portfolio_return = 0.0
+        weighted_sq = 0.0
+        n_negative = 0
+        negative_sum = 0.0
+        negative_sumsq = 0.0
+        min_return = returns[0]
+        for i in range(n):
+            r = returns[i]
+            w = weights[i]
+            portfolio_return += w * r
+            deviation = r - mean_return
+            weighted_sq += w * w * deviation * deviation
+            if r < 0.0:
+                n_negative += 1
+                negative_sum += r
+                negative_sumsq += r * r
+            if r < min_return:
+                min_return = r
+        
+        negative_std = 0.0
+        if n_negative > 0:
+            negative_mean = negative_sum / n_negative
+            negative_std = np.sqrt(max(negative_sumsq / n_negative - negative_mean * negative_mean, 0.0))
+        
+        # VaR/CVaR par sélection partielle O(N) des k pires rendements
+        k = max(1, int(math.ceil(0.05 * n)))
+        worst = np.partition(returns, k - 1)[:k]
+        var_95 = worst[k - 1]
+        cvar_95 = worst.mean()
+        
+        return (portfolio_return, np.sqrt(weighted_sq), n_negative, negative_std,
+                min_return, var_95, cvar_95)
+    
+    # Compilation immédiate pour que la première analyse ne paie pas le JIT
+    kernel(np.zeros(2), np.ones(2) / 2)
+    return kernel
+
+
+# Paliers (bornes inclusives) de la note de performance, du plus faible au plus élevé
+GRADE_SHARPE_THRESHOLDS = (0.0, 0.5, 1.0, 1.5, 2.0)
+GRADE_SORTINO_THRESHOLDS = (0.5, 1.0, 1.5, 2.0, 2.5)
+GRADE_LABELS = ("D (Insuffisant)", "C (Médiocre)", "B (Acceptable)", "B+ (Bon)", "A (Très Bon)", "A+ (Excellent)")
+
+
 class RiskPerformanceAnalyzer:
     """Analyseur avancé de risque et performance avec formules corrigées"""
 
     @staticmethod
     def get_beta(ticker: str, period: str = "2y") -> float:
-        """Récupère le bêta d'une action calculé par rapport au marché (S&P 500)"""
+        """Récupère le bêta d'une action calculé par rapport au marché (S&P 500)
+        
+        Délègue au calcul groupé get_betas. `period` est conservé pour compatibilité mais ignoré :
+        la fenêtre est toujours de 2 ans.
+        """
+        return RiskPerformanceAnalyzer.get_betas((ticker,))[ticker]
+
+    @staticmethod
+    def get_betas(tickers: Tuple[str, ...], market: str = "^GSPC", min_obs: int = 50) -> Dict[str, float]:
+        """Bêtas de plusieurs actions par rapport au marché : un seul téléchargement, calcul vectorisé
+        
+        Seuls les résultats issus de données réelles sont mis en cache (_price_betas, _info_beta) :
+        un échec de téléchargement n'est pas figé pendant une heure.
+        """
+        tickers = tuple(dict.fromkeys(tickers))
+        if not tickers:
+            return {}
+        
         try:
-            # Télécharger les données de l'action et du marché
-            stock = yf.Ticker(ticker)
-            market = yf.Ticker("^GSPC")  # S&P 500 comme proxy du marché
-            
-            # Récupérer les données historiques
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=730)  # 2 ans
-            
-            stock_data = stock.history(start=start_date, end=end_date)
-            market_data = market.history(start=start_date, end=end_date)
-            
-            if len(stock_data) < 50 or len(market_data) < 50:
-                # Si pas assez de données, utiliser le beta de yfinance
-                beta = stock.info.get('beta', 1.0)
-                return beta if beta is not None else 1.0
-            
-            # Calculer les rendements journaliers
-            stock_returns = stock_data['Close'].pct_change().dropna()
-            market_returns = market_data['Close'].pct_change().dropna()
-            
-            # Aligner les dates
-            common_dates = stock_returns.index.intersection(market_returns.index)
-            stock_returns = stock_returns.loc[common_dates]
-            market_returns = market_returns.loc[common_dates]
-            
-            # Calculer le beta
-            covariance = np.cov(stock_returns, market_returns)[0, 1]
-            market_variance = np.var(market_returns)
-            
-            beta = covariance / market_variance if market_variance > 0 else 1.0
-            
-            return beta
-            
+            betas = dict(RiskPerformanceAnalyzer._price_betas(tickers, market, min_obs))
         except Exception as e:
-            print(f"Erreur lors du calcul du bêta pour {ticker}: {e}")
-            return 1.0
+            print(f"Erreur lors du calcul groupé des bêtas: {e}")
+            betas = {}
+        
+        # Historique insuffisant : bêta fourni par yfinance, récupéré en parallèle
+        missing = [ticker for ticker in tickers if ticker not in betas]
+        if missing:
+            def info_beta(ticker):
+                try:
+                    return RiskPerformanceAnalyzer._info_beta(ticker)
+                except Exception:
+                    return 1.0
+            betas.update(zip(missing, _thread_map(info_beta, missing, max_workers=8)))
+        
+        return betas
 
     @staticmethod
-    def calculate_advanced_metrics(df: pd.DataFrame, period_days: int = 252) -> Dict:
+    @st.cache_data(ttl=3600, show_spinner=False, max_entries=32)
+    def _price_betas(tickers: Tuple[str, ...], market: str, min_obs: int) -> Dict[str, float]:
+        """Bêtas calculés sur 2 ans de cours (tickers avec au moins min_obs observations communes)
+        
+        Lève une exception si les cours sont indisponibles : rien n'est alors mis en cache.
+        """
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=730)  # 2 ans
+        # Dates au jour près pour que le cache de get_prices soit réutilisé dans la journée
+        prices = get_prices(tickers + (market,),
+                            start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+        if market not in prices.columns:
+            raise ValueError(f"Cours du marché {market} indisponibles")
+        
+        # Rendements de chaque série sur ses propres jours de cotation (places aux calendriers différents)
+        returns = prices.ffill().pct_change(fill_method=None).where(prices.notna())
+        available = [ticker for ticker in tickers if ticker in returns.columns]
+        # float32 : rendements journaliers bornés, précision largement suffisante, moitié moins de mémoire
+        R = returns[available].to_numpy(dtype=np.float32)
+        m = returns[market].to_numpy(dtype=np.float32)
+        
+        # Masque des dates communes action/marché, puis covariance et variance par colonne
+        valid = ~np.isnan(R) & ~np.isnan(m)[:, None]
+        n = valid.sum(axis=0)
+        n_safe = np.maximum(n, 2).astype(np.float32)
+        Rz = np.where(valid, R, np.float32(0.0))
+        mz = np.where(valid, m[:, None], np.float32(0.0))
+        Rc = np.where(valid, Rz - Rz.sum(axis=0) / n_safe, np.float32(0.0))
+        mc = np.where(valid, mz - mz.sum(axis=0) / n_safe, np.float32(0.0))
+        covariance = (Rc * mc).sum(axis=0) / (n_safe - 1)
+        market_variance = (mc * mc).sum(axis=0) / n_safe
+        
+        betas = {}
+        for j, ticker in enumerate(available):
+            if n[j] >= min_obs:
+                betas[ticker] = float(covariance[j] / market_variance[j]) if market_variance[j] > 0 else 1.0
+        
+        return betas
+
+    @staticmethod
+    @st.cache_data(ttl=3600, show_spinner=False)
+    def _info_beta(ticker: str) -> float:
+        """Bêta fourni par yfinance (1.0 s'il n'est pas publié) ; les erreurs réseau ne sont pas mises en cache"""
+        beta = yf.Ticker(ticker).info.get('beta')
+        return float(beta) if beta is not None else 1.0
+
+    @staticmethod
+    def calculate_advanced_metrics(df: pd.DataFrame, period_days: int = 252,
+                                   arrays: Optional[PortfolioArrays] = None) -> Dict:
         """
         Calcule les métriques avancées de risque et performance
         
         Args:
             df: DataFrame avec colonnes 'perf' (performances en %) et 'weight' (poids)
             period_days: Nombre de jours pour l'annualisation (252 par défaut)
+            arrays: Tableaux perf/weight déjà calculés par update_portfolio_metrics (optionnel)
         """
         if 'perf' not in df.columns or 'weight' not in df.columns or len(df) == 0:
             return {
@@ -1715,23 +2335,109 @@ class RiskPerformanceAnalyzer:
                 'portfolio_volatility': 0
             }
 
-        # Conversion des performances en rendements décimaux
-        returns = df['perf'].values / 100
-        weights = df['weight'].values / 100  # Normaliser les poids
+        # Réutilise les tableaux déjà extraits si disponibles (la normalisation rend l'échelle indifférente)
+        if arrays is not None:
+            perf, weight = arrays.perf, arrays.weight
+        else:
+            perf, weight = df['perf'].values, df['weight'].values
+        
+        # Cœur numérique mis en cache entre les reruns (clé : contenu des tableaux)
+        core = RiskPerformanceAnalyzer._calculate_advanced_metrics_core(perf, weight, period_days)
+        weights = RiskPerformanceAnalyzer._normalize_weights(weight)
+        annualized_return = core['portfolio_return']
+        annualized_volatility = core['portfolio_volatility']
+        risk_free_rate = core['risk_free_rate']
+        
+        # Beta du portefeuille
+        portfolio_beta = 1.0
+        if 'symbol' in df.columns:
+            try:
+                symbols = df['symbol']
+                has_symbol = (symbols.notna() & symbols.astype(str).str.strip().ne('')).to_numpy()
+                positions = np.flatnonzero(has_symbol)
+                position_symbols = symbols.iloc[positions]
+                
+                if positions.size:
+                    # Un seul téléchargement groupé pour tous les bêtas, puis somme pondérée vectorisée
+                    beta_by_symbol = RiskPerformanceAnalyzer.get_betas(tuple(position_symbols))
+                    position_betas = position_symbols.map(beta_by_symbol).to_numpy(dtype=np.float64)
+                    portfolio_beta = float(np.dot(position_betas, weights[positions]))
+            except:
+                portfolio_beta = 1.0
+        
+        # Alpha (rendement excédentaire ajusté du risque)
+        market_return = 0.08  # Rendement de marché approximatif (8% annuel)
+        alpha = annualized_return - (risk_free_rate + portfolio_beta * (market_return - risk_free_rate))
         
-        # Normaliser les poids pour qu'ils somment à 1
+        # Information Ratio (alpha / tracking error)
+        tracking_error = annualized_volatility * 0.8  # Approximation du tracking error
+        information_ratio = alpha / tracking_error if tracking_error > 0 else 0
+        
+        # Treynor Ratio (rendement excédentaire par unité de risque systématique)
+        treynor_ratio = (annualized_return - risk_free_rate) / portfolio_beta if portfolio_beta > 0 else 0
+        
+        return {
+            'sharpe_ratio': core['sharpe_ratio'],
+            'sortino_ratio': core['sortino_ratio'],
+            'calmar_ratio': core['calmar_ratio'],
+            'max_drawdown': core['max_drawdown'],
+            'var_95': core['var_95'],
+            'cvar_95': core['cvar_95'],
+            'beta': portfolio_beta,
+            'alpha': alpha,
+            'information_ratio': information_ratio,
+            'treynor_ratio': treynor_ratio,
+            'portfolio_return': annualized_return,
+            'portfolio_volatility': annualized_volatility
+        }
+
+    @staticmethod
+    def _normalize_weights(weight: np.ndarray) -> np.ndarray:
+        """Normalise les poids (en %) pour qu'ils somment à 1"""
+        weights = weight / 100
         if np.sum(weights) > 0:
-            weights = weights / np.sum(weights)
-        else:
-            weights = np.ones(len(weights)) / len(weights)
+            return weights / np.sum(weights)
+        return np.ones(len(weights)) / len(weights)
 
-        # Rendement du portefeuille (moyenne pondérée)
-        portfolio_return = np.sum(weights * returns)
-        
-        # Volatilité du portefeuille (formule correcte avec matrice de covariance)
-        # Approximation: volatilité = sqrt(somme des variances pondérées)
-        individual_volatilities = np.abs(returns - np.mean(returns))
-        portfolio_volatility = np.sqrt(np.sum((weights**2) * (individual_volatilities**2)))
+    @staticmethod
+    @st.cache_data(
+        show_spinner=False,
+        max_entries=16,
+        hash_funcs={np.ndarray: lambda a: hashlib.blake2b(a.tobytes(), digest_size=16).digest()}
+    )
+    def _calculate_advanced_metrics_core(perf: np.ndarray, weight: np.ndarray, period_days: int = 252) -> Dict:
+        """Partie purement numérique des métriques avancées (sans appel réseau)"""
+        # Conversion des performances en rendements décimaux
+        returns = np.ascontiguousarray(perf / 100, dtype=np.float64)
+        weights = np.ascontiguousarray(RiskPerformanceAnalyzer._normalize_weights(weight), dtype=np.float64)
+
+        kernel = _risk_kernel()
+        if kernel is not None:
+            # Noyau compilé : tous les accumulateurs en une seule boucle, sans tableaux temporaires
+            (portfolio_return, portfolio_volatility, n_negative, negative_std,
+             min_return, var_95, cvar_95) = kernel(returns, weights)
+        else:
+            # Rendement du portefeuille (moyenne pondérée)
+            portfolio_return = np.sum(weights * returns)
+            
+            # Volatilité du portefeuille (formule correcte avec matrice de covariance)
+            # Approximation: volatilité = sqrt(somme des variances pondérées)
+            individual_volatilities = np.abs(returns - np.mean(returns))
+            portfolio_volatility = np.sqrt(np.sum((weights**2) * (individual_volatilities**2)))
+            
+            negative_returns = returns[returns < 0]
+            n_negative = len(negative_returns)
+            negative_std = np.std(negative_returns) if n_negative > 0 else 0.0
+            
+            min_return = np.min(returns)
+            
+            # Value at Risk (VaR) 95% : sélection partielle O(N) des 5% pires rendements
+            k = max(1, math.ceil(0.05 * len(returns)))
+            worst = np.partition(returns, k - 1)[:k]
+            var_95 = worst[k - 1]
+            
+            # Conditional VaR (CVaR) 95% (perte moyenne au-delà du VaR)
+            cvar_95 = worst.mean()
         
         # Annualisation des métriques
         annualized_return = portfolio_return * period_days
@@ -1744,9 +2450,8 @@ class RiskPerformanceAnalyzer:
         sharpe_ratio = (annualized_return - risk_free_rate) / annualized_volatility if annualized_volatility > 0 else 0
         
         # Sortino Ratio (utilise seulement la volatilité des rendements négatifs)
-        negative_returns = returns[returns < 0]
-        if len(negative_returns) > 0:
-            downside_deviation = np.std(negative_returns) * np.sqrt(period_days)
+        if n_negative > 0:
+            downside_deviation = negative_std * np.sqrt(period_days)
         else:
             downside_deviation = annualized_volatility
         
@@ -1754,45 +2459,11 @@ class RiskPerformanceAnalyzer:
         
         # Maximum Drawdown (estimation basée sur la distribution)
         # Approche simplifiée: maximum des pertes potentielles
-        sorted_returns = np.sort(returns)
-        max_drawdown = abs(sorted_returns[0]) if len(sorted_returns) > 0 else 0
+        max_drawdown = abs(min_return)
         
         # Calmar Ratio
         calmar_ratio = annualized_return / max_drawdown if max_drawdown > 0 else 0
         
-        # Value at Risk (VaR) 95% (perte maximale avec 95% de confiance)
-        var_95 = np.percentile(returns, 5)
-        
-        # Conditional VaR (CVaR) 95% (perte moyenne au-delà du VaR)
-        returns_below_var = returns[returns <= var_95]
-        cvar_95 = np.mean(returns_below_var) if len(returns_below_var) > 0 else var_95
-        
-        # Beta du portefeuille
-        portfolio_beta = 1.0
-        if 'symbol' in df.columns:
-            try:
-                betas = []
-                for idx, row in df.iterrows():
-                    if pd.notna(row['symbol']) and row['symbol'].strip():
-                        beta = RiskPerformanceAnalyzer.get_beta(row['symbol'])
-                        betas.append(beta * weights[idx])
-                
-                if betas:
-                    portfolio_beta = np.sum(betas)
-            except:
-                portfolio_beta = 1.0
-        
-        # Alpha (rendement excédentaire ajusté du risque)
-        market_return = 0.08  # Rendement de marché approximatif (8% annuel)
-        alpha = annualized_return - (risk_free_rate + portfolio_beta * (market_return - risk_free_rate))
-        
-        # Information Ratio (alpha / tracking error)
-        tracking_error = annualized_volatility * 0.8  # Approximation du tracking error
-        information_ratio = alpha / tracking_error if tracking_error > 0 else 0
-        
-        # Treynor Ratio (rendement excédentaire par unité de risque systématique)
-        treynor_ratio = (annualized_return - risk_free_rate) / portfolio_beta if portfolio_beta > 0 else 0
-        
         return {
             'sharpe_ratio': sharpe_ratio,
             'sortino_ratio': sortino_ratio,
@@ -1800,48 +2471,37 @@ class RiskPerformanceAnalyzer:
             'max_drawdown': max_drawdown,
             'var_95': var_95,
             'cvar_95': cvar_95,
-            'beta': portfolio_beta,
-            'alpha': alpha,
-            'information_ratio': information_ratio,
-            'treynor_ratio': treynor_ratio,
             'portfolio_return': annualized_return,
-            'portfolio_volatility': annualized_volatility
+            'portfolio_volatility': annualized_volatility,
+            'risk_free_rate': risk_free_rate
         }
 
     @staticmethod
     def get_performance_grade(sharpe_ratio: float, sortino_ratio: float) -> str:
         """Détermine une note de performance basée sur les ratios"""
-        if sharpe_ratio >= 2.0 and sortino_ratio >= 2.5:
-            return "A+ (Excellent)"
-        elif sharpe_ratio >= 1.5 and sortino_ratio >= 2.0:
-            return "A (Très Bon)"
-        elif sharpe_ratio >= 1.0 and sortino_ratio >= 1.5:
-            return "B+ (Bon)"
-        elif sharpe_ratio >= 0.5 and sortino_ratio >= 1.0:
-            return "B (Acceptable)"
-        elif sharpe_ratio >= 0.0 and sortino_ratio >= 0.5:
-            return "C (Médiocre)"
-        else:
-            return "D (Insuffisant)"
+        if math.isnan(sharpe_ratio) or math.isnan(sortino_ratio):
+            return GRADE_LABELS[0]
+        
+        # La note est limitée par le ratio le plus faible des deux
+        rank = min(bisect_right(GRADE_SHARPE_THRESHOLDS, sharpe_ratio),
+                   bisect_right(GRADE_SORTINO_THRESHOLDS, sortino_ratio))
+        return GRADE_LABELS[rank]
 
     @staticmethod
     def calculate_portfolio_correlation_matrix(symbols: List[str], start_date: str, end_date: str) -> pd.DataFrame:
         """Calcule la matrice de corrélation du portefeuille"""
         try:
-            returns_data = {}
+            # Un seul téléchargement groupé (mis en cache) pour tous les symboles
+            prices = get_prices(tuple(dict.fromkeys(symbols)), start_date, end_date)
+            if prices.empty:
+                return pd.DataFrame()
             
-            for symbol in symbols:
-                ticker = yf.Ticker(symbol)
-                data = ticker.history(start=start_date, end=end_date)
-                if len(data) > 0:
-                    returns = data['Close'].pct_change().dropna()
-                    returns_data[symbol] = returns
-            
-            if returns_data:
-                returns_df = pd.DataFrame(returns_data)
-                return returns_df.corr()
-            else:
+            # Rendements de chaque série sur ses propres jours de cotation
+            returns_df = prices.ffill().pct_change(fill_method=None).where(prices.notna())
+            returns_df = returns_df.dropna(axis=1, how='all')
+            if returns_df.empty:
                 return pd.DataFrame()
+            return returns_df.corr()
                 
         except Exception as e:
             print(f"Erreur lors du calcul de la matrice de corrélation: {e}")
@@ -1855,12 +2515,9 @@ class EfficientFrontier:
     def get_historical_data(symbols: List[str], start_date: str, end_date: str) -> pd.DataFrame:
         """Récupère les données historiques pour les symboles donnés"""
         try:
-            data = yf.download(symbols, start=start_date, end=end_date)['Close']
-            
-            # Si un seul symbole, convertir en DataFrame
-            if isinstance(data, pd.Series):
-                data = data.to_frame()
-                data.columns = symbols
+            data = get_prices(tuple(symbols), start_date, end_date)
+            if data.empty:
+                return data
             
             # Supprimer les colonnes avec trop de valeurs manquantes
             data = data.dropna(thresh=len(data) * 0.7, axis=1)
@@ -1871,11 +2528,20 @@ class EfficientFrontier:
             print(f"Erreur lors du téléchargement des données: {e}")
             return pd.DataFrame()
     
+    @staticmethod
+    def _annualized_moments(returns: pd.DataFrame, periods: int = 252) -> Tuple[np.ndarray, np.ndarray]:
+        """Rendements moyens et covariance annualisés (rendements centrés une fois, puis Rc.T @ Rc)"""
+        R = returns.to_numpy(dtype=np.float64)
+        mean = R.mean(axis=0)
+        Rc = R - mean
+        cov = (Rc.T @ Rc) * (periods / (R.shape[0] - 1))
+        return mean * periods, cov
+    
     @staticmethod
     def calculate_portfolio_performance(weights: np.ndarray, returns: np.ndarray, cov_matrix: np.ndarray) -> Tuple[float, float]:
         """Calcule le rendement et la volatilité du portefeuille"""
-        portfolio_return = np.sum(weights * returns)
-        portfolio_variance = np.dot(weights.T, np.dot(cov_matrix, weights))
+        portfolio_return = np.dot(weights, returns)
+        portfolio_variance = np.einsum('i,ij,j->', weights, cov_matrix, weights)
         portfolio_volatility = np.sqrt(portfolio_variance)
         
         return portfolio_return, portfolio_volatility
@@ -1907,16 +2573,15 @@ class EfficientFrontier:
             if len(returns) < 30:
                 return pd.DataFrame(), {'error': 'Historique trop court (moins de 30 jours)'}
             
-            # Calculer les statistiques
-            mean_returns = returns.mean() * 252  # Annualiser
-            cov_matrix = returns.cov() * 252  # Annualiser
+            # Calculer les statistiques annualisées (tableaux NumPy)
+            mean_returns, cov_matrix = EfficientFrontier._annualized_moments(returns)
             
             # Vérifier la matrice de covariance
-            if np.any(np.isnan(cov_matrix.values)) or np.any(np.isinf(cov_matrix.values)):
+            if not np.all(np.isfinite(cov_matrix)):
                 return pd.DataFrame(), {'error': 'Matrice de covariance invalide'}
             
-            # Nombre d'actifs
-            num_assets = len(symbols)
+            # Nombre d'actifs (colonnes conservées après nettoyage des données)
+            num_assets = len(mean_returns)
             
             # Contraintes
             constraints = {'type': 'eq', 'fun': lambda x: np.sum(x) - 1}  # Somme des poids = 1
@@ -1929,7 +2594,7 @@ class EfficientFrontier:
             result = minimize(
                 EfficientFrontier.negative_sharpe_ratio,
                 initial_weights,
-                args=(mean_returns.values, cov_matrix.values, risk_free_rate),
+                args=(mean_returns, cov_matrix, risk_free_rate),
                 method='SLSQP',
                 bounds=bounds,
                 constraints=constraints,
@@ -1944,7 +2609,7 @@ class EfficientFrontier:
             
             # Calculer les métriques du portefeuille optimal
             portfolio_return, portfolio_volatility = EfficientFrontier.calculate_portfolio_performance(
-                optimal_weights, mean_returns.values, cov_matrix.values
+                optimal_weights, mean_returns, cov_matrix
             )
             
             sharpe_ratio = (portfolio_return - risk_free_rate) / portfolio_volatility
@@ -1952,7 +2617,7 @@ class EfficientFrontier:
             # Créer le DataFrame des résultats
             results_df = pd.DataFrame({
                 'weight': optimal_weights
-            }, index=symbols)
+            }, index=returns.columns)
             
             # Filtrer les poids significatifs (> 0.5%)
             results_df = results_df[results_df['weight'] > 0.005].sort_values('weight', ascending=False)
@@ -1979,45 +2644,55 @@ class EfficientFrontier:
                 return [], []
             
             returns = price_data.pct_change().dropna()
-            mean_returns = returns.mean() * 252
-            cov_matrix = returns.cov() * 252
+            if len(returns) < 2:
+                return [], []
+            mu, cov = EfficientFrontier._annualized_moments(returns)
             
-            # Générer des portefeuilles aléatoires
-            num_assets = len(symbols)
-            results = []
+            # Générer tous les portefeuilles aléatoires d'un coup (une ligne de poids par portefeuille)
+            num_assets = len(mu)  # colonnes conservées après nettoyage des données
+            weights = np.random.random((num_portfolios * 10, num_assets))
+            weights /= weights.sum(axis=1, keepdims=True)
             
-            for _ in range(num_portfolios * 10):  # Générer plus de portefeuilles
-                # Poids aléatoires
-                weights = np.random.random(num_assets)
-                weights /= np.sum(weights)
-                
-                # Calculer les métriques
-                portfolio_return, portfolio_volatility = EfficientFrontier.calculate_portfolio_performance(
-                    weights, mean_returns.values, cov_matrix.values
-                )
-                
-                results.append({
-                    'return': portfolio_return,
-                    'volatility': portfolio_volatility,
-                    'sharpe': (portfolio_return - 0.02) / portfolio_volatility if portfolio_volatility > 0 else 0
-                })
+            # Rendements et volatilités de tous les portefeuilles en deux produits matriciels
+            portfolio_returns = weights @ mu
+            portfolio_volatilities = np.sqrt(np.einsum('ij,ij->i', weights @ cov, weights))
+            sharpe = np.divide(portfolio_returns - 0.02, portfolio_volatilities,
+                               out=np.zeros_like(portfolio_returns), where=portfolio_volatilities > 0)
             
             # Trier par ratio de Sharpe et garder les meilleurs
-            results.sort(key=lambda x: x['sharpe'], reverse=True)
-            results = results[:num_portfolios]
-            
-            # Extraire les rendements et volatilités
-            returns_list = [r['return'] for r in results]
-            volatility_list = [r['volatility'] for r in results]
+            best = np.argsort(-sharpe, kind='stable')[:num_portfolios]
             
-            return returns_list, volatility_list
+            return portfolio_returns[best].tolist(), portfolio_volatilities[best].tolist()
             
         except Exception as e:
             print(f"Erreur lors de la génération de la courbe: {e}")
             return [], []
 
 
-def create_advanced_risk_analysis(df: pd.DataFrame, ticker_data: Optional[List[Dict]] = None):
+@st.cache_data(show_spinner=False, max_entries=16)
+def _fig_risk_radar(axes: Tuple[str, ...], values: Tuple[float, ...]) -> go.Figure:
+    """Radar du profil de risque, reconstruit seulement si les métriques normalisées changent"""
+    fig_radar = go.Figure()
+    
+    fig_radar.add_trace(go.Scatterpolar(
+        r=list(values),
+        theta=list(axes),
+        fill='toself',
+        name='Profil de Risque'
+    ))
+    
+    fig_radar.update_layout(
+        polar=dict(
+            radialaxis=dict(visible=True, range=[0, 1])
+        ),
+        showlegend=True,
+        title="Profil de Risque du Portefeuille"
+    )
+    return fig_radar
+
+
+def create_advanced_risk_analysis(df: pd.DataFrame, ticker_data: Optional[List[Dict]] = None,
+                                  arrays: Optional[PortfolioArrays] = None):
     """
     Analyse de risque avancée avec frontière efficiente corrigée
     """
@@ -2051,7 +2726,7 @@ def create_advanced_risk_analysis(df: pd.DataFrame, ticker_data: Optional[List[D
 
     try:
         # Calcul des métriques avancées
-        metrics = RiskPerformanceAnalyzer.calculate_advanced_metrics(df)
+        metrics = RiskPerformanceAnalyzer.calculate_advanced_metrics(df, arrays=arrays)
 
         # Affichage des métriques principales
         st.markdown("#### 📊 Métriques de Performance")
@@ -2100,23 +2775,8 @@ def create_advanced_risk_analysis(df: pd.DataFrame, ticker_data: Optional[List[D
             'Alpha': max(0, min((metrics['alpha'] + 0.05) / 0.1, 1))
         }
         
-        fig_radar = go.Figure()
-        
-        fig_radar.add_trace(go.Scatterpolar(
-            r=list(metrics_normalized.values()),
-            theta=list(metrics_normalized.keys()),
-            fill='toself',
-            name='Profil de Risque'
-        ))
-        
-        fig_radar.update_layout(
-            polar=dict(
-                radialaxis=dict(visible=True, range=[0, 1])
-            ),
-            showlegend=True,
-            title="Profil de Risque du Portefeuille"
-        )
-        
+        fig_radar = _fig_risk_radar(tuple(metrics_normalized),
+                                    tuple(float(v) for v in metrics_normalized.values()))
         st.plotly_chart(fig_radar, use_container_width=True)
 
         # Section Frontière Efficiente
@@ -2183,24 +2843,22 @@ def create_advanced_risk_analysis(df: pd.DataFrame, ticker_data: Optional[List[D
                                 st.subheader("🎯 Allocation Optimale")
                                 
                                 # Comparaison avec les poids actuels
-                                comparison_data = []
-                                for symbol in optimal_weights_df.index:
-                                    current_weight = 0
-                                    if symbol in df['symbol'].values:
-                                        mask = df['symbol'] == symbol
-                                        if mask.any():
-                                            current_weight = df.loc[mask, 'weight'].iloc[0] / 100
-                                    
-                                    optimal_weight = optimal_weights_df.loc[symbol, 'weight']
-                                    
-                                    comparison_data.append({
-                                        'Actif': symbol,
-                                        'Poids Actuel (%)': current_weight * 100,
-                                        'Poids Optimal (%)': optimal_weight * 100,
-                                        'Différence (%)': (optimal_weight - current_weight) * 100
-                                    })
+                                # Alignement vectorisé : première position de chaque symbole, -1 si absent
+                                first_positions = df.drop_duplicates('symbol')
+                                positions = pd.Index(first_positions['symbol']).get_indexer(optimal_weights_df.index)
+                                current_weights = np.where(
+                                    positions >= 0,
+                                    first_positions['weight'].to_numpy(dtype=np.float64)[positions] / 100,
+                                    0.0
+                                )
+                                optimal_weights = optimal_weights_df['weight'].to_numpy(dtype=np.float64)
                                 
-                                comparison_df = pd.DataFrame(comparison_data)
+                                comparison_df = pd.DataFrame({
+                                    'Actif': optimal_weights_df.index,
+                                    'Poids Actuel (%)': current_weights * 100,
+                                    'Poids Optimal (%)': optimal_weights * 100,
+                                    'Différence (%)': (optimal_weights - current_weights) * 100
+                                })
                                 
                                 st.dataframe(
                                     comparison_df.style.format({
@@ -2291,7 +2949,7 @@ def export_portfolio_report(df: pd.DataFrame):
         
         # Filtrer les colonnes qui existent
         available_columns = [col for col in export_columns if col in df.columns]
-        export_df = df[available_columns].copy()
+        export_df = df[available_columns]
         
         # Renommer les colonnes pour l'export
         column_rename = {
@@ -2309,7 +2967,10 @@ def export_portfolio_report(df: pd.DataFrame):
         
         export_df = export_df.rename(columns={k: v for k, v in column_rename.items() if k in export_df.columns})
         
-        csv = export_df.to_csv(index=False)
+        # Écriture directe en octets : pas de chaîne intermédiaire ré-encodée par download_button
+        csv_buffer = io.BytesIO()
+        export_df.to_csv(csv_buffer, index=False, lineterminator='\n')
+        csv = csv_buffer.getvalue()
         st.download_button(
             label="💾 Télécharger CSV",
             data=csv,
@@ -2322,17 +2983,19 @@ def export_portfolio_report(df: pd.DataFrame):
     # Option d'export JSON pour une utilisation programmatique
     if st.button("📋 Générer rapport JSON"):
         # Créer un rapport complet avec métadonnées
-        report_data = {
-            'metadata': {
-                'export_date': datetime.now().isoformat(),
-                'total_positions': len(df),
-                'total_value': df['amount'].sum() if 'amount' in df.columns else 0,
-                'portfolio_performance': (df['weight'] * df['perf']).sum() if all(col in df.columns for col in ['weight', 'perf']) else 0
-            },
-            'positions': df.to_dict('records')
+        metadata = {
+            'export_date': datetime.now().isoformat(),
+            'total_positions': len(df),
+            'total_value': df['amount'].sum() if 'amount' in df.columns else 0,
+            'portfolio_performance': _weighted_sum(df['weight'], df['perf']) if all(col in df.columns for col in ['weight', 'perf']) else 0
         }
         
-        json_str = json.dumps(report_data, indent=2, ensure_ascii=False, default=str)
+        # Les positions passent par l'encodeur JSON C de pandas (pas de dict Python par ligne)
+        positions_json = df.to_json(orient='records', force_ascii=False, date_format='iso', default_handler=str)
+        json_str = (
+            '{"metadata": ' + json.dumps(metadata, ensure_ascii=False, default=str)
+            + ', "positions": ' + positions_json + '}'
+        )
         st.download_button(
             label="💾 Télécharger JSON",
             data=json_str,
@@ -2349,6 +3012,347 @@ def export_portfolio_report(df: pd.DataFrame):
         else:
             st.info("Aucune donnée de portefeuille disponible")
 
+# Colonnes du tableau détaillé (ordre d'affichage) et leurs libellés
+DETAIL_COLUMN_NAMES = {
+    'name': 'Nom',
+    'symbol': 'Symbole',
+    'quantity': 'Quantité',
+    "purchase_date": 'Date',
+    'buyingPrice': "Prix d'achat",
+    'lastPrice': 'Prix actuel',
+    'amount': 'Montant (€)',
+    'weight_pct': 'Poids (%)',
+    'perf': 'Performance (%)',
+    'sector': 'Secteur'
+}
+
+# Nombre de lignes du tableau détaillé envoyées par page
+DETAIL_PAGE_SIZE = 50
+
+# Formats numériques par libellé affiché
+DETAIL_NUMBER_FORMATS = {
+    "Prix d'achat": '{:.2f}',
+    'Prix actuel': '{:.2f}',
+    'Montant (€)': '{:,.2f}',
+    'Poids (%)': '{:.1f}',
+    'Performance (%)': '{:.2f}'
+}
+
+@st.cache_data(show_spinner=False)
+def _display_spec(cols: Tuple[str, ...]) -> Tuple[List[str], Dict[str, str], Dict[str, str]]:
+    """Colonnes disponibles, renommage et formats du tableau détaillé pour un jeu de colonnes"""
+    available = [col for col in DETAIL_COLUMN_NAMES if col in cols]
+    rename = {col: DETAIL_COLUMN_NAMES[col] for col in available}
+    format_dict = {label: fmt for label, fmt in DETAIL_NUMBER_FORMATS.items() if label in rename.values()}
+    return available, rename, format_dict
+
+def _color_perf_col(col: pd.Series) -> np.ndarray:
+    """Couleurs CSS d'une colonne de performance (vert si positif, rouge si négatif)"""
+    values = col.to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.select([values > 0, values < 0], ['color: green', 'color: red'], default='color: black')
+
+def _styled_detail_table(df_display: pd.DataFrame, format_dict: Dict[str, str]):
+    """Styler du tableau détaillé (formats issus de _display_spec, mis en cache)
+    
+    Un Styler neuf à chaque rendu : il mémorise son état de rendu et ne doit pas être
+    partagé entre sessions. Seule la page affichée (DETAIL_PAGE_SIZE lignes) est stylée.
+    """
+    styled_df = df_display.style.format(format_dict)
+    
+    # Style conditionnel vectorisé sur la colonne performance (une seule passe par colonne)
+    if 'Performance (%)' in df_display.columns:
+        styled_df = styled_df.apply(_color_perf_col, subset=['Performance (%)'])
+    
+    return styled_df
+
+def _metric_strings(total_value: float, n_positions: int, performance: float,
+                    avg_weight: float) -> Tuple[str, str, str, str]:
+    """Libellés formatés des métriques principales du portefeuille"""
+    return (f"{total_value:,.2f} €", str(n_positions), f"{performance:.2f}%", f"{avg_weight:.1f}%")
+
+@st.fragment
+def _render_detail_table(df: pd.DataFrame):
+    """Tableau détaillé du portefeuille, réexécuté seul lors d'un changement de page"""
+    st.subheader("📋 Détail du portefeuille")
+
+    # Colonnes, libellés et formats dépendent seulement des colonnes présentes
+    available_display_columns, column_names, format_dict = _display_spec(tuple(df.columns))
+
+    if available_display_columns:
+        # Formatage du DataFrame pour l'affichage
+        df_display = df[available_display_columns].rename(columns=column_names)
+
+        # Pagination côté serveur : seules les lignes de la page sont stylées et envoyées
+        if len(df_display) > DETAIL_PAGE_SIZE:
+            n_pages = math.ceil(len(df_display) / DETAIL_PAGE_SIZE)
+            page = st.number_input("Page", min_value=1, max_value=n_pages, value=1, step=1)
+            first_row = (page - 1) * DETAIL_PAGE_SIZE
+            df_display = df_display.iloc[first_row:first_row + DETAIL_PAGE_SIZE]
+
+        styled_df = _styled_detail_table(df_display, format_dict)
+
+        st.dataframe(styled_df, use_container_width=True, height=400)
+    else:
+        st.dataframe(df, use_container_width=True, height=400)
+
+# Figures Plotly mises en cache : reconstruites seulement si les données changent
+@st.cache_data(show_spinner=False, max_entries=16, hash_funcs={pd.DataFrame: _hash_frame})
+def _fig_weight_pie(df: pd.DataFrame) -> go.Figure:
+    """Camembert de répartition par position"""
+    fig_pie = px.pie(df, values='weight_pct', names='name',
+                     title="Répartition par position (Top 10)")
+    fig_pie.update_layout(height=400)
+    return fig_pie
+
+@st.cache_data(show_spinner=False, max_entries=16, hash_funcs={pd.DataFrame: _hash_frame})
+def _fig_asset_bar(df: pd.DataFrame) -> go.Figure:
+    """Barres de répartition par type d'actif"""
+    # factorize + bincount : une passe NumPy au lieu d'un groupby (codes -1 = valeurs manquantes)
+    codes, uniques = pd.factorize(df['asset_type'], sort=False)
+    valid = codes >= 0
+    sums = np.bincount(codes[valid], weights=df['weight_pct'].to_numpy(dtype=np.float64)[valid],
+                       minlength=len(uniques))
+    asset_dist = pd.DataFrame({'asset_type': np.asarray(uniques), 'weight_pct': sums})
+    fig_asset = px.bar(asset_dist, x='asset_type', y='weight_pct',
+                       title="Répartition par type d'actif")
+    fig_asset.update_layout(height=400)
+    return fig_asset
+
+@st.cache_data(show_spinner=False, max_entries=16, hash_funcs={pd.DataFrame: _hash_frame})
+def _fig_sector_bar(sector_analysis: pd.DataFrame) -> go.Figure:
+    """Barres d'exposition sectorielle (8 premiers secteurs)"""
+    top_sectors = sector_analysis.head(8)
+    fig_sector = px.bar(top_sectors, x=top_sectors.index,
+                        y='Weight_Pct', title="Exposition sectorielle (%)")
+    fig_sector.update_layout(height=300, xaxis_title="Secteur", yaxis_title="Poids (%)")
+    return fig_sector
+
+@st.cache_data(show_spinner=False, max_entries=16, hash_funcs={pd.DataFrame: _hash_frame})
+def _fig_geo_pie(geo_analysis: pd.DataFrame) -> go.Figure:
+    """Camembert de répartition géographique"""
+    fig_geo = px.pie(geo_analysis, values='Weight_Pct', names=geo_analysis.index,
+                     title="Répartition géographique")
+    fig_geo.update_layout(height=300)
+    return fig_geo
+
+# Sections d'analyse du portefeuille, dans l'ordre d'affichage
+ANALYSIS_TABS = [
+    "📊 Vue d'ensemble",
+    "📈 Diversification",
+    "⚠️ Analyse de risque",
+    "🎯 Recommandations",
+    "📤 Export"
+]
+
+def _render_overview_tab(df: pd.DataFrame):
+    """Section vue d'ensemble : résumé et graphiques de répartition"""
+    columns = frozenset(df.columns)
+    display_portfolio_summary(df)
+
+    # Graphiques de répartition
+    col1, col2 = st.columns(2)
+
+    with col1:
+        if 'weight_pct' in columns:
+            top_idx = _top_k_positions(df['weight_pct'].to_numpy(dtype=np.float64), 10)
+            st.plotly_chart(_fig_weight_pie(df[['name', 'weight_pct']].iloc[top_idx]), use_container_width=True)
+        else: 
+            pass
+
+    with col2:
+        if {'asset_type', 'weight_pct'} <= columns:
+            st.plotly_chart(_fig_asset_bar(df[['asset_type', 'weight_pct']]), use_container_width=True)
+        else:
+            pass
+
+def _render_diversification_tab(df: pd.DataFrame):
+    """Section diversification : concentration, secteurs et régions"""
+    # Analyses de diversification (mises en cache)
+    concentration_metrics = DiversificationAnalyzer.calculate_concentration_metrics(df)
+    sector_analysis, geo_analysis = _cached_diversification_analyses(df)
+    
+    st.subheader("🎯 Analyse de diversification")
+
+    # Affichage des métriques
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Indice HHI", f"{concentration_metrics['hhi']:.3f}")
+    with col2:
+        st.metric("Actions effectives", f"{concentration_metrics['effective_stocks']:.1f}")
+    with col3:
+        st.metric("Top 3 concentration", f"{concentration_metrics['top3_concentration']:.1%}")
+    with col4:
+        st.metric("Niveau", concentration_metrics['concentration_level'])
+
+    # Analyses sectorielles et géographiques
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.subheader("🏭 Diversification sectorielle")
+        if not sector_analysis.empty:
+            st.dataframe(sector_analysis.style.format({
+                'Weight_Pct': '{:.1f}%',
+                'Avg_Performance': '{:.2f}%'
+            }))
+
+            # Graphique sectoriel
+            st.plotly_chart(_fig_sector_bar(sector_analysis), use_container_width=True)
+        else:
+            st.info("Données sectorielles non disponibles")
+
+    with col2:
+        st.subheader("🌍 Diversification géographique")
+        if not geo_analysis.empty:
+            st.dataframe(geo_analysis.style.format({
+                'Weight_Pct': '{:.1f}%',
+                'Avg_Performance': '{:.2f}%'
+            }))
+
+            # Graphique géographique
+            st.plotly_chart(_fig_geo_pie(geo_analysis), use_container_width=True)
+        else:
+            st.info("Données géographiques non disponibles")
+
+def _render_recommendations_tab(df: pd.DataFrame, arrays: Optional[PortfolioArrays] = None):
+    """Section recommandations personnalisées"""
+    # Analyses de diversification (mises en cache)
+    concentration_metrics = DiversificationAnalyzer.calculate_concentration_metrics(df)
+    sector_analysis, geo_analysis = _cached_diversification_analyses(df)
+    
+    st.subheader("🎯 Recommandations personnalisées")
+
+    # Génération des recommandations
+    generate_recommendations(df, concentration_metrics, sector_analysis, geo_analysis,
+                             arrays=arrays)
+
+@st.fragment
+def _render_analysis_section(df: pd.DataFrame, arrays: Optional[PortfolioArrays] = None):
+    """Sélecteur et contenu de la section d'analyse active"""
+    # Sélecteur de section : seule la section active est calculée et rendue
+    active_tab = st.radio(
+        "Section",
+        ANALYSIS_TABS,
+        horizontal=True,
+        key="active_tab",
+        label_visibility="collapsed"
+    )
+
+    if active_tab == "📊 Vue d'ensemble":
+        _render_overview_tab(df)
+    elif active_tab == "📈 Diversification":
+        _render_diversification_tab(df)
+    elif active_tab == "⚠️ Analyse de risque":
+        create_advanced_risk_analysis(df, arrays=arrays)
+    elif active_tab == "🎯 Recommandations":
+        _render_recommendations_tab(df, arrays)
+    else:
+        export_portfolio_report(df)
+
+@st.fragment
+def _search_panel_fragment(portfolio_manager: PortfolioManager):
+    """Recherche, validation et ajout d'une action, réexécutés seuls lors des saisies"""
+    # Recherche de ticker
+    search_query = st.text_input("Rechercher un ticker ou nom d'entreprise").strip()
+
+    # Pas de requête réseau avant 2 caractères
+    if len(search_query) >= 2:
+        with st.spinner("Recherche en cours..."):
+            search_results = TickerService.search_tickers(search_query, limit=5)
+
+        if search_results:
+            # Sélection du ticker
+            ticker_options = [f"{result['symbol']} - {result['name']}" for result in search_results]
+            selected_ticker_idx = st.selectbox(
+                "Sélectionner un ticker",
+                range(len(ticker_options)),
+                format_func=lambda x: ticker_options[x]
+            )
+
+            selected_ticker = search_results[selected_ticker_idx]
+
+            # Validation du ticker
+            with st.spinner("Validation du ticker..."):
+                ticker_data = TickerService.validate_ticker(selected_ticker['symbol'])
+
+            if ticker_data['valid']:
+                _add_stock_form(ticker_data, portfolio_manager)
+            else:
+                st.error(f"❌ Ticker invalide: {ticker_data.get('error', 'Erreur inconnue')}")
+        else:
+            st.info("Aucun résultat trouvé")
+
+def _add_stock_form(ticker_data: Dict, portfolio_manager: PortfolioManager):
+    """Formulaire d'ajout d'une action validée"""
+    # Affichage des informations du ticker
+    st.info(f"**{ticker_data['name']}**\nPrix actuel: {ticker_data['price']:.2f} {ticker_data['currency']}")
+
+    # Saisie de la quantité
+    quantity = st.number_input("Quantité", min_value=1, value=1)
+
+    purchase_date=st.date_input("Date d'achat", datetime.now().strftime("%Y-%m-%d"))
+    st.write(f"**Date d'achat:** {purchase_date}")
+
+    # NOUVELLE SECTION : Choix du prix d'achat
+    st.markdown("**Prix d'achat:**")
+    price_option = st.radio(
+        "Choisir le prix d'achat",
+        ["Prix actuel", "Prix personnalisé"],
+        key="price_option"
+    )
+
+    buying_price = None
+    if price_option == "Prix actuel":
+        buying_price = ticker_data['price']
+        st.success(f"✅ Prix d'achat: {buying_price:.2f} {ticker_data['currency']} (prix actuel)")
+    else:
+        buying_price = st.number_input(
+            f"Prix d'achat personnalisé ({ticker_data['currency']})",
+            min_value=0.01,
+            value=ticker_data['price'],
+            step=0.01,
+            format="%.2f"
+        )
+
+    # Montants calculés une seule fois pour l'aperçu et le résumé
+    total_cost = buying_price * quantity
+    current_value = ticker_data['price'] * quantity
+    pnl = current_value - total_cost
+
+    # Affichage de la plus/moins-value potentielle (prix personnalisé)
+    if price_option != "Prix actuel" and buying_price != ticker_data['price']:
+        pnl_percent = (pnl / total_cost * 100) if total_cost > 0 else 0
+
+        if pnl > 0:
+            st.success(f"📈 Plus-value: +{pnl:.2f} {ticker_data['currency']} ({pnl_percent:+.2f}%)")
+        elif pnl < 0:
+            st.error(f"📉 Moins-value: {pnl:.2f} {ticker_data['currency']} ({pnl_percent:+.2f}%)")
+        else:
+            st.info("➡️ Aucune plus/moins-value")
+
+    # Résumé de l'ajout
+    with st.expander("📋 Résumé de l'ajout"):
+        # Résumé émis en un seul bloc Markdown
+        summary_lines = [
+            f"**Quantité:** {quantity}",
+            f"**Prix d'achat unitaire:** {buying_price:.2f} {ticker_data['currency']}",
+            f"**Prix actuel unitaire:** {ticker_data['price']:.2f} {ticker_data['currency']}",
+            f"**Coût total d'achat:** {total_cost:.2f} {ticker_data['currency']}",
+            f"**Valeur actuelle:** {current_value:.2f} {ticker_data['currency']}"
+        ]
+        if pnl != 0:
+            pnl_color = "green" if pnl > 0 else "red"
+            summary_lines.append(f"**Plus/Moins-value:** :{pnl_color}[{pnl:+.2f} {ticker_data['currency']}]")
+        st.markdown("\n\n".join(summary_lines))
+
+    if st.button("Ajouter au portefeuille"):
+        # Le rendement annualisé est calculé par add_stock_to_portfolio
+        success = portfolio_manager.add_stock_to_portfolio(ticker_data, quantity, buying_price, purchase_date)
+        if success:
+            st.success("✅ Action ajoutée au portefeuille!")
+            st.rerun()
+        else:
+            st.error("❌ Erreur lors de l'ajout")
+
 def main():
     """Fonction principale de l'application Streamlit"""
     
@@ -2376,9 +3380,19 @@ def main():
             try:
                 # Lecture du fichier selon son type
                 if uploaded_file.name.endswith('.csv'):
-                    df_imported = pd.read_csv(uploaded_file)
+                    try:
+                        # Lecteur pyarrow multithreadé (pandas >= 2.0 avec pyarrow)
+                        df_imported = pd.read_csv(uploaded_file, engine='pyarrow')
+                    except (ImportError, ValueError):
+                        uploaded_file.seek(0)
+                        df_imported = pd.read_csv(uploaded_file)
                 elif uploaded_file.name.endswith('.xlsx'):
-                    df_imported = pd.read_excel(uploaded_file)
+                    try:
+                        # Lecteur calamine (Rust) si python-calamine est installé (pandas >= 2.2)
+                        df_imported = pd.read_excel(uploaded_file, engine='calamine')
+                    except (ImportError, ValueError):
+                        uploaded_file.seek(0)
+                        df_imported = pd.read_excel(uploaded_file)
                 elif uploaded_file.name.endswith('.json'):
                     json_data = json.load(uploaded_file)
                     if 'positions' in json_data:
@@ -2389,7 +3403,8 @@ def main():
                 # Amélioration automatique du DataFrame
                 df_enhanced = enhance_dataframe(df_imported)
                 st.session_state.portfolio_df = df_enhanced
-                st.session_state.original_df = df_imported.copy()
+                st.session_state.portfolio_rows = []
+                st.session_state.original_df = df_imported
                 
                 st.success(f"✅ Fichier importé: {len(df_enhanced)} positions")
                 
@@ -2400,302 +3415,57 @@ def main():
         st.subheader("➕ Ajouter une action")
     
         
-        # Recherche de ticker
-        search_query = st.text_input("Rechercher un ticker ou nom d'entreprise")
-        
-        if search_query:
-            with st.spinner("Recherche en cours..."):
-                search_results = TickerService.search_tickers(search_query, limit=5)
-            
-            if search_results:
-                # Sélection du ticker
-                ticker_options = [f"{result['symbol']} - {result['name']}" for result in search_results]
-                selected_ticker_idx = st.selectbox(
-                    "Sélectionner un ticker",
-                    range(len(ticker_options)),
-                    format_func=lambda x: ticker_options[x]
-                )
-                
-                selected_ticker = search_results[selected_ticker_idx]
-                
-                # Validation du ticker
-                with st.spinner("Validation du ticker..."):
-                    ticker_data = TickerService.validate_ticker(selected_ticker['symbol'])
-                
-                if ticker_data['valid']:
-                    # Affichage des informations du ticker
-                    st.info(f"**{ticker_data['name']}**\nPrix actuel: {ticker_data['price']:.2f} {ticker_data['currency']}")
-                    
-                    # Saisie de la quantité
-                    quantity = st.number_input("Quantité", min_value=1, value=1)
-
-                    purchase_date=st.date_input("Date d'achat", datetime.now().strftime("%Y-%m-%d"))
-                    st.write(f"**Date d'achat:** {purchase_date}")
-
-                    # NOUVELLE SECTION : Choix du prix d'achat
-                    st.markdown("**Prix d'achat:**")
-                    price_option = st.radio(
-                        "Choisir le prix d'achat",
-                        ["Prix actuel", "Prix personnalisé"],
-                        key="price_option"
-                    )
-                    
-                    buying_price = None
-                    if price_option == "Prix actuel":
-                        buying_price = ticker_data['price']
-                        st.success(f"✅ Prix d'achat: {buying_price:.2f} {ticker_data['currency']} (prix actuel)")
-                    else:
-                        buying_price = st.number_input(
-                            f"Prix d'achat personnalisé ({ticker_data['currency']})",
-                            min_value=0.01,
-                            value=ticker_data['price'],
-                            step=0.01,
-                            format="%.2f"
-                        )
-                        
-                        # Calcul et affichage de la plus/moins-value potentielle
-                        if buying_price != ticker_data['price']:
-                            pnl_per_share = ticker_data['price'] - buying_price
-                            pnl_total = pnl_per_share * quantity
-                            pnl_percent = (pnl_per_share / buying_price * 100) if buying_price > 0 else 0
-                            
-                            if pnl_per_share > 0:
-                                st.success(f"📈 Plus-value: +{pnl_total:.2f} {ticker_data['currency']} ({pnl_percent:+.2f}%)")
-                            elif pnl_per_share < 0:
-                                st.error(f"📉 Moins-value: {pnl_total:.2f} {ticker_data['currency']} ({pnl_percent:+.2f}%)")
-                            else:
-                                st.info("➡️ Aucune plus/moins-value")
-                    
-                    # Résumé de l'ajout
-                    with st.expander("📋 Résumé de l'ajout"):
-                        total_cost = buying_price * quantity
-                        current_value = ticker_data['price'] * quantity
-                        st.write(f"**Quantité:** {quantity}")
-                        st.write(f"**Prix d'achat unitaire:** {buying_price:.2f} {ticker_data['currency']}")
-                        st.write(f"**Prix actuel unitaire:** {ticker_data['price']:.2f} {ticker_data['currency']}")
-                        st.write(f"**Coût total d'achat:** {total_cost:.2f} {ticker_data['currency']}")
-                        st.write(f"**Valeur actuelle:** {current_value:.2f} {ticker_data['currency']}")
-                        
-                        pnl = current_value - total_cost
-                        if pnl != 0:
-                            pnl_color = "green" if pnl > 0 else "red"
-                            st.markdown(f"**Plus/Moins-value:** <span style='color: {pnl_color}'>{pnl:+.2f} {ticker_data['currency']}</span>", unsafe_allow_html=True)
-                    
-                    if st.button("Ajouter au portefeuille"):
-                        annualized_return = calculate_annualized_return(purchase_price, ticker_data['price'], days_held)
-
-                        success = portfolio_manager.add_stock_to_portfolio(ticker_data, quantity, buying_price,purchase_date, annualized_return)
-                        if success:
-                            st.success("✅ Action ajoutée au portefeuille!")
-                            st.rerun()
-                        else:
-                            st.error("❌ Erreur lors de l'ajout")
-                else:
-                    st.error(f"❌ Ticker invalide: {ticker_data.get('error', 'Erreur inconnue')}")
-            else:
-                st.info("Aucun résultat trouvé")
+        _search_panel_fragment(portfolio_manager)
     # Contenu principal
-    if not st.session_state.portfolio_df.empty:
-        df = st.session_state.portfolio_df
+    df = portfolio_manager.portfolio_df
+    if not df.empty:
         
         # Mise à jour des métriques
         metrics = portfolio_manager.update_portfolio_metrics()
         
         # Métriques principales
+        columns = frozenset(df.columns)
+        avg_weight = float(np.nanmean(df['weight_pct'].to_numpy(dtype=np.float64))) if 'weight_pct' in columns else 0.0
+        total_str, count_str, perf_str, weight_str = _metric_strings(
+            metrics['total_value'], len(df), metrics['portfolio_performance'], avg_weight
+        )
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("Valeur totale", f"{metrics['total_value']:,.2f} €")
+            st.metric("Valeur totale", total_str)
         with col2:
-            st.metric("Nombre de positions", len(df))
+            st.metric("Nombre de positions", count_str)
         with col3:
-            st.metric("Performance globale", f"{metrics['portfolio_performance']:.2f}%")
+            st.metric("Performance globale", perf_str)
         with col4:
-            avg_weight = df['weight_pct'].mean() if 'weight_pct' in df.columns else 0
-            st.metric("Poids moyen", f"{avg_weight:.1f}%")
+            st.metric("Poids moyen", weight_str)
         
-        # Onglets pour différentes analyses
-        tab1, tab2, tab3, tab4, tab5 = st.tabs([
-            "📊 Vue d'ensemble", 
-            "📈 Diversification", 
-            "⚠️ Analyse de risque", 
-            "🎯 Recommandations", 
-            "📤 Export"
-        ])
-        
-        with tab1:
-            display_portfolio_summary(df)
-            
-            # Graphiques de répartition
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                if 'weight_pct' in df.columns:
-                    fig_pie = px.pie(df.head(10), values='weight_pct', names='name', 
-                                   title="Répartition par position (Top 10)")
-                    fig_pie.update_layout(height=400)
-                    st.plotly_chart(fig_pie, use_container_width=True)
-                else: 
-                    pass
-                    
-            with col2:
-                if 'asset_type' in df.columns and 'weight_pct' in df.columns:
-                    asset_dist = df.groupby('asset_type')['weight_pct'].sum().reset_index()
-                    fig_asset = px.bar(asset_dist, x='asset_type', y='weight_pct',
-                                     title="Répartition par type d'actif")
-                    fig_asset.update_layout(height=400)
-                    st.plotly_chart(fig_asset, use_container_width=True)
-                else:
-                    pass
-        with tab2:
-            st.subheader("🎯 Analyse de diversification")
-            
-            # Calcul des métriques de concentration
-            concentration_metrics = DiversificationAnalyzer.calculate_concentration_metrics(df)
-            
-            # Affichage des métriques
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.metric("Indice HHI", f"{concentration_metrics['hhi']:.3f}")
-            with col2:
-                st.metric("Actions effectives", f"{concentration_metrics['effective_stocks']:.1f}")
-            with col3:
-                st.metric("Top 3 concentration", f"{concentration_metrics['top3_concentration']:.1%}")
-            with col4:
-                st.metric("Niveau", concentration_metrics['concentration_level'])
-            
-            # Analyses sectorielles et géographiques
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.subheader("🏭 Diversification sectorielle")
-                sector_analysis = DiversificationAnalyzer.analyze_sector_diversification(df)
-                if not sector_analysis.empty:
-                    st.dataframe(sector_analysis.style.format({
-                        'Weight_Pct': '{:.1f}%',
-                        'Avg_Performance': '{:.2f}%'
-                    }))
-                    
-                    # Graphique sectoriel
-                    fig_sector = px.bar(sector_analysis.head(8), x=sector_analysis.head(8).index, 
-                                      y='Weight_Pct', title="Exposition sectorielle (%)")
-                    fig_sector.update_layout(height=300, xaxis_title="Secteur", yaxis_title="Poids (%)")
-                    st.plotly_chart(fig_sector, use_container_width=True)
-                else:
-                    st.info("Données sectorielles non disponibles")
-            
-            with col2:
-                st.subheader("🌍 Diversification géographique")
-                geo_analysis = DiversificationAnalyzer.analyze_geographic_diversification(df)
-                if not geo_analysis.empty:
-                    st.dataframe(geo_analysis.style.format({
-                        'Weight_Pct': '{:.1f}%',
-                        'Avg_Performance': '{:.2f}%'
-                    }))
-                    
-                    # Graphique géographique
-                    fig_geo = px.pie(geo_analysis, values='Weight_Pct', names=geo_analysis.index,
-                                   title="Répartition géographique")
-                    fig_geo.update_layout(height=300)
-                    st.plotly_chart(fig_geo, use_container_width=True)
-                else:
-                    st.info("Données géographiques non disponibles")
-        
-        with tab3:
-            create_advanced_risk_analysis(df)
-
-        with tab4:
-            st.subheader("🎯 Recommandations personnalisées")
-            
-            # Calcul des analyses nécessaires pour les recommandations
-            concentration_metrics = DiversificationAnalyzer.calculate_concentration_metrics(df)
-            sector_analysis = DiversificationAnalyzer.analyze_sector_diversification(df)
-            geo_analysis = DiversificationAnalyzer.analyze_geographic_diversification(df)
-            
-            # Génération des recommandations
-            generate_recommendations(df, concentration_metrics, sector_analysis, geo_analysis)
-        
-        with tab5:
-            export_portfolio_report(df)
+        # Sections d'analyse (fragment : changer de section ne relance pas toute l'application)
+        _render_analysis_section(df, metrics['arrays'])
         
         # Tableau détaillé du portefeuille
-        st.subheader("📋 Détail du portefeuille")
-        
-        # Colonnes à afficher
-        display_columns = ['name', 'symbol', 'quantity', "purchase_date", 'buyingPrice', 'lastPrice', 
-                          'amount', 'weight_pct', 'perf', 'sector']
-        available_display_columns = [col for col in display_columns if col in df.columns]
-        
-        if available_display_columns:
-            # Formatage du DataFrame pour l'affichage
-            df_display = df[available_display_columns].copy()
-            
-            # Renommage des colonnes pour l'affichage
-            column_names = {
-                'name': 'Nom',
-                'symbol': 'Symbole',
-                'quantity': 'Quantité',
-                "purchase_date": 'Date',
-                'buyingPrice': "Prix d'achat",
-                'lastPrice': 'Prix actuel',
-                'amount': 'Montant (€)',
-                'weight_pct': 'Poids (%)',
-                'perf': 'Performance (%)',
-                'sector': 'Secteur'
-            }
-            
-            df_display = df_display.rename(columns={k: v for k, v in column_names.items() if k in df_display.columns})
-            
-            # Application du style conditionnel
-            def color_performance(val):
-                try:
-                    if val > 0:
-                        return 'color: green'
-                    elif val < 0:
-                        return 'color: red'
-                    else:
-                        return 'color: black'
-                except:
-                    return 'color: black'
-            
-            # Formatage des nombres
-            format_dict = {}
-            if 'Prix d\'achat' in df_display.columns:
-                format_dict['Prix d\'achat'] = '{:.2f}'
-            if 'Prix actuel' in df_display.columns:
-                format_dict['Prix actuel'] = '{:.2f}'
-            if 'Montant (€)' in df_display.columns:
-                format_dict['Montant (€)'] = '{:,.2f}'
-            if 'Poids (%)' in df_display.columns:
-                format_dict['Poids (%)'] = '{:.1f}'
-            if 'Performance (%)' in df_display.columns:
-                format_dict['Performance (%)'] = '{:.2f}'
-            
-            styled_df = df_display.style.format(format_dict)
-            
-            # Application du style conditionnel sur la performance si elle existe
-            if 'Performance (%)' in df_display.columns:
-                styled_df = styled_df.applymap(color_performance, subset=['Performance (%)'])
-            
-            st.dataframe(styled_df, use_container_width=True, height=400)
-        else:
-            st.dataframe(df, use_container_width=True, height=400)
+        _render_detail_table(df)
         
         # Option de suppression de positions
         st.subheader("🗑️ Gestion des positions")
         
         if len(df) > 0:
+            # Libellés construits une fois à partir des colonnes (pas de Series par option)
+            names = df['name'].tolist()
+            symbols = df['symbol'].tolist() if 'symbol' in columns else ['N/A'] * len(df)
+            delete_labels = [f"{name} ({symbol})" for name, symbol in zip(names, symbols)]
             position_to_delete = st.selectbox(
                 "Sélectionner une position à supprimer",
                 range(len(df)),
-                format_func=lambda x: f"{df.iloc[x]['name']} ({df.iloc[x].get('symbol', 'N/A')})"
+                format_func=delete_labels.__getitem__
             )
             
             col1, col2 = st.columns([1, 4])
             with col1:
                 if st.button("🗑️ Supprimer", type="secondary"):
-                    st.session_state.portfolio_df = st.session_state.portfolio_df.drop(
-                        st.session_state.portfolio_df.index[position_to_delete]
-                    ).reset_index(drop=True)
+                    # Une seule copie par masque booléen au lieu de drop + reset_index
+                    keep = np.ones(len(df), dtype=bool)
+                    keep[position_to_delete] = False
+                    st.session_state.portfolio_df = df.iloc[keep].reset_index(drop=True)
                     st.success("Position supprimée!")
                     st.rerun()
             
@@ -2703,15 +3473,28 @@ def main():
                 if st.button("🔄 Actualiser les prix", type="primary"):
                     with st.spinner("Actualisation des prix en cours..."):
                         updated_count = 0
-                        for idx, row in st.session_state.portfolio_df.iterrows():
-                            if 'symbol' in row and row['symbol']:
-                                try:
-                                    ticker_data = TickerService.validate_ticker(row['symbol'])
-                                    if ticker_data['valid']:
-                                        st.session_state.portfolio_df.at[idx, 'lastPrice'] = ticker_data['price']
-                                        updated_count += 1
-                                except:
-                                    continue
+                        df_portfolio = portfolio_manager.portfolio_df
+                        if 'symbol' in df_portfolio.columns:
+                            # Un seul téléchargement groupé puis une affectation vectorisée
+                            symbol_col = df_portfolio['symbol'].dropna().astype(str)
+                            # Symboles vides ou blancs ignorés : aucun appel réseau inutile
+                            symbols = tuple(symbol_col[symbol_col.str.strip().ne('')].unique())
+                            try:
+                                price_map = dict(TickerService.get_last_prices(symbols))
+                            except Exception:
+                                price_map = {}
+                            
+                            # Tickers absents du téléchargement groupé : validation individuelle en parallèle
+                            missing_symbols = [symbol for symbol in symbols if symbol not in price_map]
+                            for symbol, ticker_data in zip(missing_symbols,
+                                                           TickerService.validate_tickers_many(missing_symbols)):
+                                if ticker_data['valid']:
+                                    price_map[symbol] = ticker_data['price']
+                            new_prices = df_portfolio['symbol'].map(price_map)
+                            updated_count = int(new_prices.notna().sum())
+                            if 'lastPrice' in df_portfolio.columns:
+                                new_prices = new_prices.fillna(df_portfolio['lastPrice'])
+                            df_portfolio['lastPrice'] = new_prices
                         
                         if updated_count > 0:
                             # Recalcul des métriques après mise à jour